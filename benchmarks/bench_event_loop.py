@@ -0,0 +1,193 @@
+"""
+Event loop lag with many jobs waiting in the bot: per-job synchronous polling (the old
+_poll_result loops) vs. the dispatcher on the async job tracker.
+
+An in-memory Redis stands in for the server, every command costs --latency ms: a blocking
+sleep for the synchronous client, an awaited one for the async client.
+
+Usage: python -m benchmarks.bench_event_loop [--jobs 300] [--seconds 10] [--latency 0.5]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from rq import Queue
+from rq.job import Job
+from rq.serializers import DefaultSerializer
+
+from bot.dispatcher import JobDispatcher
+from bot.tracker import JobTracker
+
+
+class FakeRedis:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.hashes: dict[bytes, dict[str, bytes]] = {}
+        self.lists: dict[str, list[bytes]] = {}
+        self.commands = 0
+
+    def _hmget(self, key, *fields):
+        return [self.hashes.get(key, {}).get(f) for f in fields]
+
+    def _lrange(self, key, start, end):
+        return list(self.lists.get(key, []))
+
+    # synchronous client, like the old job.get_status/get_meta/get_position calls
+    def call(self, name, *args):
+        self.commands += 1
+        time.sleep(self.latency)
+        return getattr(self, f"_{name}")(*args)
+
+
+class FakeAsyncRedis:
+    def __init__(self, redis: FakeRedis):
+        self._redis = redis
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, connection: FakeAsyncRedis):
+        self._connection = connection
+        self._calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def hmget(self, *args):
+        self._calls.append(("hmget", args))
+
+    def lrange(self, *args):
+        self._calls.append(("lrange", args))
+
+    async def execute(self):
+        redis = self._connection._redis
+        redis.commands += 1
+        await asyncio.sleep(redis.latency)
+        return [getattr(redis, f"_{name}")(*args) for name, args in self._calls]
+
+
+class Simulation:
+    """
+    Jobs wait in the queue, then render for a while, then finish, staggered over the run.
+    """
+
+    def __init__(self, redis: FakeRedis, jobs: int, seconds: float):
+        self.redis = redis
+        self.seconds = seconds
+        self.queue_key = Queue.redis_queue_namespace_prefix + "single"
+        self.jobs = []
+
+        for idx in range(jobs):
+            job = Job(id=f"job{idx}", connection=redis)
+            job.origin = "single"
+            self.jobs.append(job)
+            redis.hashes[Job.key_for(job.id)] = {
+                "status": b"queued",
+                "meta": DefaultSerializer.dumps({}),
+            }
+        redis.lists[self.queue_key] = [job.id.encode() for job in self.jobs]
+
+    async def run_workers(self):
+        t1 = time.monotonic()
+
+        while (elapsed := time.monotonic() - t1) < self.seconds:
+            for idx, job in enumerate(self.jobs):
+                start = self.seconds * 0.8 * idx / len(self.jobs)
+                key = Job.key_for(job.id)
+
+                if elapsed < start:
+                    continue
+
+                progress = min((elapsed - start) / (self.seconds * 0.2), 1.0)
+                status = b"finished" if progress >= 1.0 else b"started"
+                self.redis.hashes[key]["status"] = status
+                self.redis.hashes[key]["meta"] = DefaultSerializer.dumps(
+                    {"progress": progress}
+                )
+
+                if job.id.encode() in self.redis.lists[self.queue_key]:
+                    self.redis.lists[self.queue_key].remove(job.id.encode())
+            await asyncio.sleep(0.05)
+
+        for job in self.jobs:
+            self.redis.hashes[Job.key_for(job.id)]["status"] = b"finished"
+
+
+async def monitor(lags: list, stop: asyncio.Event, tick=0.01):
+    while not stop.is_set():
+        t1 = time.monotonic()
+        await asyncio.sleep(tick)
+        lags.append(time.monotonic() - t1 - tick)
+
+
+async def polling(sim: Simulation):
+    async def poll(job: Job):
+        key = Job.key_for(job.id)
+
+        while True:
+            sim.redis.call("lrange", sim.queue_key, 0, -1)
+            status, _ = sim.redis.call("hmget", key, "status", "meta")
+            sim.redis.call("hmget", key, "meta")
+            sim.redis.call("hmget", key, "meta")
+
+            if status == b"finished":
+                return
+            await asyncio.sleep(1)
+
+    await asyncio.gather(*(poll(job) for job in sim.jobs))
+
+
+async def dispatching(sim: Simulation):
+    dispatcher = JobDispatcher(JobTracker(FakeAsyncRedis(sim.redis)))
+    task = asyncio.get_event_loop().create_task(dispatcher.run())
+
+    async def wait(job: Job):
+        updates = dispatcher.register(job)
+
+        while (await updates.get()).status != "finished":
+            pass
+        dispatcher.unregister(job)
+
+    await asyncio.gather(*(wait(job) for job in sim.jobs))
+    task.cancel()
+
+
+async def measure(mode, args) -> tuple[list, int]:
+    redis = FakeRedis(args.latency / 1000)
+    sim = Simulation(redis, args.jobs, args.seconds)
+    lags = []
+    stop = asyncio.Event()
+    monitor_task = asyncio.get_event_loop().create_task(monitor(lags, stop))
+    workers_task = asyncio.get_event_loop().create_task(sim.run_workers())
+    await mode(sim)
+    stop.set()
+    await monitor_task
+    await workers_task
+    return lags, redis.commands
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bot event loop lag under load.")
+    parser.add_argument("--jobs", type=int, default=300)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--latency", type=float, default=0.5, help="ms per command")
+    args = parser.parse_args()
+
+    for name, mode in (("polling", polling), ("dispatcher", dispatching)):
+        lags, commands = asyncio.run(measure(mode, args))
+        lags = sorted(lag * 1000 for lag in lags)
+        print(
+            f"{name:<11} lag mean {statistics.mean(lags):7.2f} ms"
+            f"  p99 {lags[int(len(lags) * 0.99)]:7.2f} ms"
+            f"  max {lags[-1]:7.2f} ms  redis commands {commands}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Redis commands per job for progress reporting, per-frame save_meta vs. ProgressReporter.
+
+Usage: python -m benchmarks.bench_progress [--frames 1200] [--frame-ms 5]
+"""
+import argparse
+import time
+
+from renderer.progress import ProgressReporter
+
+
+class CountingConnection:
+    def __init__(self):
+        self.commands = 0
+
+    def hset(self, *args):
+        self.commands += 1
+
+    def publish(self, *args):
+        self.commands += 1
+
+
+class BenchJob:
+    """
+    Just enough of rq's Job for the reporter, save_meta is one HSET like rq's.
+    """
+
+    def __init__(self):
+        self.id = "bench"
+        self.meta = {}
+        self.connection = CountingConnection()
+
+    def save_meta(self):
+        self.connection.hset(self.id, "meta", self.meta)
+
+
+def per_frame(frames: int, frame_ms: float) -> int:
+    job = BenchJob()
+
+    for idx in range(frames):
+        time.sleep(frame_ms / 1000)
+        job.meta["progress"] = (idx + 1) / frames
+        job.save_meta()
+    return job.connection.commands
+
+
+def throttled(frames: int, frame_ms: float, **kwargs) -> int:
+    job = BenchJob()
+    progress = ProgressReporter(job, **kwargs)
+
+    for idx in range(frames):
+        time.sleep(frame_ms / 1000)
+        progress.update(progress=(idx + 1) / frames)
+    return job.connection.commands
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Progress reporting Redis command count.")
+    parser.add_argument("--frames", type=int, default=1200)
+    parser.add_argument("--frame-ms", type=float, default=5)
+    parser.add_argument("--interval", type=int, default=1000)
+    parser.add_argument("--step", type=float, default=0.05)
+    args = parser.parse_args()
+
+    print("per-frame save_meta:", per_frame(args.frames, args.frame_ms))
+    print(
+        "reporter:",
+        throttled(args.frames, args.frame_ms, interval=args.interval, step=args.step),
+    )
+    print(
+        "reporter + pub/sub:",
+        throttled(
+            args.frames,
+            args.frame_ms,
+            interval=args.interval,
+            step=args.step,
+            channel="progress",
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
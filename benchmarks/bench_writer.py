@@ -0,0 +1,106 @@
+"""
+Encode time vs. output size for the encoder profiles on a fixed synthetic frame sequence.
+
+Usage: python -m benchmarks.bench_writer [--frames 300] [--size 800x850]
+"""
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+
+from renderer.writer import EncoderProfile, FFmpegWriter
+
+
+def synthetic_frames(count: int, size: tuple[int, int], seed=0) -> list[Image.Image]:
+    """
+    Minimap-like frames: a static background with a grid and a few moving icons.
+    :param count: Number of frames.
+    :param size: Frame size.
+    :param seed: Random seed.
+    :return:
+    """
+    rnd = random.Random(seed)
+    w, h = size
+    bg = Image.new("RGBA", size, "#21415e")
+    bg_draw = ImageDraw.Draw(bg)
+
+    for x in range(0, w, 76):
+        bg_draw.line([(x, 0), (x, h)], fill="#ffffff40")
+    for y in range(0, h, 76):
+        bg_draw.line([(0, y), (w, y)], fill="#ffffff40")
+    for _ in range(30):
+        x, y, r = rnd.randrange(w), rnd.randrange(h), rnd.randrange(10, 60)
+        bg_draw.ellipse([(x - r, y - r), (x + r, y + r)], fill="#7f7a5c")
+
+    icons = [
+        [rnd.randrange(w), rnd.randrange(h), rnd.uniform(-2, 2), rnd.uniform(-2, 2)]
+        for _ in range(24)
+    ]
+    frames = []
+
+    for idx in range(count):
+        frame = bg.copy()
+        draw = ImageDraw.Draw(frame)
+        draw.text((5, 5), f"{idx // 60:02}:{idx % 60:02}", fill="white")
+
+        for icon in icons:
+            icon[0] = (icon[0] + icon[2]) % w
+            icon[1] = (icon[1] + icon[3]) % h
+            x, y = icon[0], icon[1]
+            draw.polygon([(x, y - 8), (x + 6, y + 6), (x - 6, y + 6)], fill="#4ce8aa")
+            draw.text((x - 20, y + 10), "SHIP NAME", fill="#4ce8aa")
+        frames.append(frame)
+    return frames
+
+
+def run(frames: list[Image.Image], fps: int, profile: EncoderProfile) -> tuple[float, int]:
+    path = tempfile.NamedTemporaryFile("w", delete=False, suffix=".mp4").name
+
+    try:
+        t1 = time.perf_counter()
+        with FFmpegWriter(path, frames[0].size, fps, profile) as writer:
+            for frame in frames:
+                writer.write(frame)
+        t2 = time.perf_counter()
+        return t2 - t1, os.path.getsize(path)
+    finally:
+        os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encoder profile benchmark matrix.")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--size", default="800x850")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--quality", type=int, default=7)
+    parser.add_argument("--codecs", nargs="+", default=["libx264", "libx265", "libvpx-vp9"])
+    parser.add_argument("--presets", nargs="+", default=["ultrafast", "veryfast", "medium"])
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 0])
+    parser.add_argument("--pix-fmts", nargs="+", default=["rgba", "rgb24", "yuv420p"])
+    args = parser.parse_args()
+
+    w, h = map(int, args.size.split("x"))
+    frames = synthetic_frames(args.frames, (w, h))
+
+    print(f"{'codec':<12}{'preset':<11}{'threads':>8}{'pix_fmt':>9}{'seconds':>9}{'KiB':>9}")
+
+    for codec, preset, threads, pix_fmt in itertools.product(
+        args.codecs, args.presets, args.threads, args.pix_fmts
+    ):
+        profile = EncoderProfile.from_quality(
+            args.quality, codec=codec, preset=preset, threads=threads, pix_fmt_in=pix_fmt
+        )
+        try:
+            seconds, size = run(frames, args.fps, profile)
+        except RuntimeError as e:
+            print(f"{codec:<12}{preset:<11}{threads:>8}{pix_fmt:>9}  failed: {e}")
+            continue
+        print(f"{codec:<12}{preset:<11}{threads:>8}{pix_fmt:>9}{seconds:>9.2f}{size / 1024:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
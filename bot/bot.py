@@ -9,6 +9,7 @@ from discord.ext.commands import AutoShardedBot
 from utils.helpers import check_environ_vars
 from utils.logger import LOGGER, LOGGER_BOT, LOGGER_REDIS
 
+from .cogs.base import DISPATCHER
 from .cogs.cog_administrative import Administrative
 from .cogs.cog_extract_chat import ExtractChat
 from .cogs.cog_help import Help
@@ -114,6 +115,7 @@ async def on_ready():
             LOGGER_BOT.exception(e)
 
     LOGGER_BOT.info(f"Cogs loaded.")
+    BOT.loop.create_task(DISPATCHER.run())
     LOGGER_BOT.info(f"Bot ready.")
     subscribe_to_logger()
 
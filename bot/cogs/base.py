@@ -1,19 +1,27 @@
+import asyncio
 import json
 import os
 
-from discord import Embed, Message, TextChannel, User
+from discord import Attachment, Embed, Message, TextChannel, User
 from discord.ext.commands import Bot, Cog, Context
 from discord.guild import Guild
 from discord.permissions import Permissions
 from rq.job import Job
 from utils.logger import LOGGER_BOT, logger_extra
-from utils.redisconn import ASYNC_REDIS, REDIS
-from utils.settings import retrieve_from_env
+from utils.redisconn import ASYNC_REDIS
+from utils.settings import retrieve_from_env, retrieve_progress_settings
+from utils.spool import SPOOL
 from utils.strings import MSG_DQP186, MSG_FNB379, MSG_IIZ122, MSG_OIJ303, MSG_QFA769, MSG_QYM865, MSG_SPS820, MSG_YSL748, MSG_ZLD216
 from utils.redisconn import ASYNC_REDIS
 from rq import Queue
 from rq.job import Job
-from rq.worker import Worker
+from bot.dispatcher import JobDispatcher
+from bot.tracker import JobTracker
+
+TRACKER = JobTracker(ASYNC_REDIS)
+DISPATCHER = JobDispatcher(
+    TRACKER, channel=retrieve_progress_settings().get("channel", None)
+)
 
 def track_task_request(f):
     async def wrapped(self, ctx: Context, *args, **kwargs):
@@ -77,7 +85,8 @@ class TaskCog(PermissionCheckerCog):
         self._required_perm = json.loads(retrieve_from_env("BOT_REQUIRED_PERM", str))
 
     async def _checks(self, ctx: Context, queue: Queue):
-        worker_count = Worker.count(connection=REDIS, queue=queue)
+        worker_count = await TRACKER.worker_count(queue.name)
+        queue_count = await TRACKER.queue_count(queue.name)
         cooldown = await ASYNC_REDIS.ttl(f"cooldown_{ctx.author.id}")
         message = ctx.message
 
@@ -87,7 +96,7 @@ class TaskCog(PermissionCheckerCog):
         try:
             assert worker_count != 0, f"{message.author.mention} {MSG_DQP186}"
             assert (
-                queue.count <= self._task_queue_size
+                queue_count <= self._task_queue_size
             ), f"{message.author.mention} {MSG_QFA769}"
             assert cooldown <= 0, f"{message.author.mention} {MSG_IIZ122} {cooldown}s"
             assert not await ASYNC_REDIS.exists(
@@ -101,6 +110,27 @@ class TaskCog(PermissionCheckerCog):
             await self._try_delete_message(message)
             return False
 
+    @staticmethod
+    async def _stage_attachment(attachment: Attachment, job_ttl: int) -> str:
+        """
+        Saves the attachment to the spool, the job only gets the key.
+        :param attachment: Uploaded replay/zip.
+        :param job_ttl: Seconds the job can stay queued, the upload is kept at least as long.
+        :return: Spool key.
+        """
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, SPOOL.cleanup)
+        path = SPOOL.new_temp()
+
+        try:
+            await attachment.save(path)
+        except Exception:
+            os.remove(path)
+            raise
+
+        suffix = os.path.splitext(attachment.filename)[1].lower()
+        return await loop.run_in_executor(None, SPOOL.put_input, path, suffix, job_ttl)
+
     def _get_embed(self, ctx: Context, color: int, **kwargs) -> Embed:
         username = self._username_to_use(ctx)
         filename = ctx.message.attachments[0].filename
@@ -147,9 +177,23 @@ class TaskCog(PermissionCheckerCog):
         return embed
 
     @staticmethod
-    def _get_job_position(job: Job):
-        _pos = job.get_position()
-        return _pos + 1 if _pos else 1
+    async def _edit_embed(message: Message, embed: Embed, last_embed: dict) -> dict:
+        """
+        Edits the message only if the embed is different from the last one sent.
+        :param message: Message to edit.
+        :param embed: New embed.
+        :param last_embed: Last sent embed as dict.
+        :return: The embed sent as dict.
+        """
+        embed_dict = embed.to_dict()
+
+        if embed_dict != last_embed:
+            await message.edit(embed=embed)
+        return embed_dict
+
+    @staticmethod
+    async def _get_job_position(job: Job):
+        return await TRACKER.position(job)
 
     @staticmethod
     async def _try_delete_message(message: Message):
@@ -31,13 +31,24 @@ from utils.constants import GREEN, ORANGE, RED, BOX_MEGA, BOX_BIG, BOX_NORM
 from utils.helpers import check_environ_vars
 from utils.logger import LOGGER_BOT, command_logger, logger_extra
 from utils.redisconn import ASYNC_REDIS, REDIS
+from utils.settings import QUEUE_DEFAULTS
 from utils.strings import *
+from renderer.writer import PRESETS
 
 from ..checks import check_is_authorized
 from ..message import MSG_ERROR, MSG_OK, MSG_WARN, create_bot_message
 
 check_environ_vars(LOGGER_BOT, "BACKUP_KEY", "BOT_REQUIRED_PERM", "SETTINGS_PREFIX")
-VALID_SETTINGS = {"FPS": (int, 15, 60), "QUALITY": (int, 1, 10)}
+# (type, min, max) or (type, choices).
+VALID_SETTINGS = {
+    "FPS": (int, 15, 60),
+    "QUALITY": (int, 1, 10),
+    "PRESET": (str.lower, PRESETS),
+    "THREADS": (int, 0, 16),
+    "BUDGET": (int, 0, 3600),
+}
+# Queues a setting can be overridden for, the render tasks fall back to the global value.
+VALID_QUEUES = ("single", "dual")
 SETTINGS_PREFIX = getenv("SETTINGS_PREFIX")
 
 
@@ -282,12 +293,15 @@ class Administrative(Cog):
             await ctx.send(embed=create_bot_message(MSG_RAR548, MSG_WARN))
 
     @settings.command(name="set")
-    async def _settings_set(self, ctx: Context, key: str, value: str):
+    async def _settings_set(
+        self, ctx: Context, key: str, value: str, queue: str = None
+    ):
         """
         Sets a setting value.
         :param ctx: Context.
         :param key: Setting name.
         :param value: Setting value.
+        :param queue: Only set it for this queue.
         :return: None
         """
         key = key.upper()
@@ -302,23 +316,32 @@ class Administrative(Cog):
                 )
                 return
 
-            value = VALID_SETTINGS[key][0](value)
-            min_value = VALID_SETTINGS[key][1]
-            max_value = VALID_SETTINGS[key][2]
+            if not (setting_key := await self._get_setting_key(ctx, key, queue)):
+                return
+
+            setting = VALID_SETTINGS[key]
+            value = setting[0](value)
 
-            if not min_value <= value <= max_value:
-                raise ValueError("range", min_value, max_value)
+            if len(setting) == 2:
+                if value not in setting[1]:
+                    raise ValueError("choice", setting[1])
+            elif not setting[1] <= value <= setting[2]:
+                raise ValueError("range", setting[1], setting[2])
 
-            await ASYNC_REDIS.set(f"{SETTINGS_PREFIX}.{key}", value)
+            await ASYNC_REDIS.set(setting_key, value)
             await ctx.send(
                 embed=create_bot_message(MSG_RLV149.format(key, value), MSG_OK)
             )
         except ValueError as e:
-            msg_val = (
-                (MSG_VNJ492.format(*e.args[1:]), MSG_ERROR)
-                if e.args[0] == "range"
-                else (MSG_KND322, MSG_ERROR)
-            )
+            if e.args[0] == "range":
+                msg_val = (MSG_VNJ492.format(*e.args[1:]), MSG_ERROR)
+            elif e.args[0] == "choice":
+                msg_val = (
+                    MSG_PRS318.format(", ".join(f"`{c}`" for c in e.args[1])),
+                    MSG_ERROR,
+                )
+            else:
+                msg_val = (MSG_KND322, MSG_ERROR)
             await ctx.send(embed=create_bot_message(*msg_val))
 
         except Exception as e:
@@ -327,11 +350,12 @@ class Administrative(Cog):
         return
 
     @settings.command(name="get")
-    async def _settings_get(self, ctx: Context, key: str):
+    async def _settings_get(self, ctx: Context, key: str, queue: str = None):
         """
         Gets the setting value.
         :param ctx: Context.
         :param key: Setting name.
+        :param queue: Get the value used by this queue.
         :return: None.
         """
         key_upper = key.upper()
@@ -346,17 +370,85 @@ class Administrative(Cog):
                 )
                 return
 
-            setting_value = await ASYNC_REDIS.get(f"{SETTINGS_PREFIX}.{key_upper}")
-            setting_value = setting_value.decode()
-            await ctx.send(
-                embed=create_bot_message(
-                    MSG_DSQ832.format(key_upper, setting_value), MSG_OK
+            if not (setting_key := await self._get_setting_key(ctx, key_upper, queue)):
+                return
+
+            setting_value = await ASYNC_REDIS.get(setting_key)
+            default = QUEUE_DEFAULTS.get(queue.lower(), {}).get(key_upper) if queue else None
+
+            if setting_value is None and default is not None:
+                message = MSG_QDF417.format(key_upper, queue.lower(), default)
+            elif setting_value is None and queue:
+                setting_value = await ASYNC_REDIS.get(f"{SETTINGS_PREFIX}.{key_upper}")
+                setting_value = setting_value.decode() if setting_value else "unset"
+                message = MSG_QNS562.format(key_upper, queue.lower(), setting_value)
+            else:
+                setting_value = setting_value.decode() if setting_value else "unset"
+                message = MSG_DSQ832.format(key_upper, setting_value)
+
+            await ctx.send(embed=create_bot_message(message, MSG_OK))
+        except Exception as e:
+            LOGGER_BOT.error(e, exc_info=e)
+            await ctx.send(embed=create_bot_message(MSG_OTK071, MSG_ERROR))
+
+    @settings.command(name="unset")
+    async def _settings_unset(self, ctx: Context, key: str, queue: str):
+        """
+        Removes a queue's setting value, the queue uses the global one again.
+        :param ctx: Context.
+        :param key: Setting name.
+        :param queue: Queue name.
+        :return: None.
+        """
+        key_upper = key.upper()
+
+        try:
+            if key_upper not in VALID_SETTINGS:
+                await ctx.send(
+                    embed=create_bot_message(
+                        MSG_SOR600.format(", ".join(f"`{s}`" for s in VALID_SETTINGS)),
+                        MSG_WARN,
+                    )
                 )
-            )
+                return
+
+            if not (setting_key := await self._get_setting_key(ctx, key_upper, queue)):
+                return
+
+            await ASYNC_REDIS.delete(setting_key)
+
+            if (default := QUEUE_DEFAULTS.get(queue.lower(), {}).get(key_upper)) is not None:
+                message = MSG_UND638.format(key_upper, queue.lower(), default)
+            else:
+                message = MSG_UNS204.format(key_upper, queue.lower())
+
+            await ctx.send(embed=create_bot_message(message, MSG_OK))
         except Exception as e:
             LOGGER_BOT.error(e, exc_info=e)
             await ctx.send(embed=create_bot_message(MSG_OTK071, MSG_ERROR))
 
+    @staticmethod
+    async def _get_setting_key(ctx: Context, key: str, queue: str = None):
+        """
+        Redis key of the setting, None (after telling the user) if the queue isn't valid.
+        :param ctx: Context.
+        :param key: Setting name.
+        :param queue: Queue name, None for the global setting.
+        :return:
+        """
+        if queue is None:
+            return f"{SETTINGS_PREFIX}.{key}"
+
+        if queue.lower() not in VALID_QUEUES:
+            await ctx.send(
+                embed=create_bot_message(
+                    MSG_QUE745.format(", ".join(f"`{q}`" for q in VALID_QUEUES)),
+                    MSG_WARN,
+                )
+            )
+            return None
+        return f"{SETTINGS_PREFIX}.{queue.lower()}.{key}"
+
     ##########
     # GUILDS #
     ##########
@@ -1,5 +1,4 @@
-import asyncio
-from io import BytesIO, StringIO
+from io import StringIO
 
 import discord
 from bot.checks import check_guild_can_extract
@@ -21,7 +20,8 @@ from utils.logger import LOGGER_BOT, command_logger_render_extract, logger_extra
 from utils.redisconn import REDIS
 from utils.strings import *
 
-from .base import TaskCog, track_task_request
+from bot.dispatcher import JobUpdate
+from .base import DISPATCHER, TRACKER, TaskCog, track_task_request
 
 QUEUE = Queue(name="chat", connection=REDIS)
 
@@ -43,19 +43,18 @@ class ExtractChat(TaskCog):
         if not await self._checks(ctx, QUEUE):
             return
 
-        job_ttl = max(QUEUE.count, 1) * self._queue_max_wait_time
+        queue_count = await TRACKER.queue_count(QUEUE.name)
+        job_ttl = max(queue_count, 1) * self._queue_max_wait_time
         attachment: Attachment = message.attachments[0]
 
-        with BytesIO() as buf:
-            await attachment.save(buf)
-            buf.seek(0)
-            job: Job = QUEUE.enqueue(
-                task_extract_chat,
-                args=(buf.read(), ctx.author.id),
-                failure_ttl=180,
-                result_ttl=180,
-                ttl=job_ttl,
-            )
+        key = await self._stage_attachment(attachment, job_ttl)
+        job: Job = QUEUE.enqueue(
+            task_extract_chat,
+            args=(key, ctx.author.id),
+            failure_ttl=180,
+            result_ttl=180,
+            ttl=job_ttl,
+        )
 
         self._bot.loop.create_task(self._poll_result(ctx, job))
         await self._try_delete_message(message)
@@ -64,43 +63,50 @@ class ExtractChat(TaskCog):
     @track_task_request
     async def _poll_result(self, ctx: Context, job: Job):
         ch: TextChannel = ctx.channel
-        position = self._get_job_position(job)
+        position = await self._get_job_position(job)
         embed = self._get_embed(ctx, ORANGE, status="Queued", position=position)
         message: Message = await ch.send(embed=embed)
         status = "Failed"
 
+        updates = DISPATCHER.register(job)
+        last_embed = embed.to_dict()
+
         try:
             while True:
-                position = self._get_job_position(job)
-                status = job.get_status(refresh=True)
+                update: JobUpdate = await updates.get()
+                status = update.status
                 if status == "queued":
-                    embed = self._get_embed(ctx, ORANGE, status="Queued", position=position)
-                    await message.edit(embed=embed)
+                    embed = self._get_embed(
+                        ctx, ORANGE, status="Queued", position=update.position
+                    )
+                    last_embed = await self._edit_embed(message, embed, last_embed)
                 elif status == "started":
                     try:
-                        if task_status := job.get_meta(refresh=True).get("status", None):
+                        if task_status := update.task_status:
                             embed = self._get_embed(ctx, YELLOW, status=task_status)
                         else:
                             embed = self._get_embed(ctx, YELLOW, status="Running")
                     except Exception as e:
                         LOGGER_BOT.error(e, exc_info=e)
-                    await message.edit(embed=embed)
+                    last_embed = await self._edit_embed(message, embed, last_embed)
                 elif status == "finished":
-                    if isinstance(job.result, Exception):
-                        if isinstance(job.result, VersionNotFoundError):
+                    result = await TRACKER.result(job)
+
+                    if isinstance(result, Exception):
+                        if isinstance(result, VersionNotFoundError):
                             err_message = MSG_ANM988
-                        elif isinstance(job.result, UnsupportedBattleTypeError):
+                        elif isinstance(result, UnsupportedBattleTypeError):
                             err_message = MSG_KOL445
-                        elif isinstance(job.result, ReadingError):
+                        elif isinstance(result, ReadingError):
                             err_message = MSG_JYQ473
                         else:
                             err_message = MSG_IBK358
                         embed = self._get_embed(
                             ctx, RED, status="Error", result=err_message
                         )
-                        LOGGER_BOT.error(job.result, exc_info=job.result)
-                    elif isinstance(job.result, tuple):
-                        data, random_str, time_taken = job.result
+                        LOGGER_BOT.error(result, exc_info=result)
+                    elif isinstance(result, tuple):
+                        data, random_str, time_taken = result
 
                         try:
                             with StringIO(data) as reader:
@@ -151,9 +157,9 @@ class ExtractChat(TaskCog):
                     embed = self._get_embed(ctx, RED, status="Max queue time reached.")
                     await message.edit(embed=embed)
                     break
-                await asyncio.sleep(1)
         except Exception as e:
             LOGGER_BOT.error(e, exc_info=e)
 
-        job.delete()
+        DISPATCHER.unregister(job)
+        await TRACKER.delete(job)
         return status
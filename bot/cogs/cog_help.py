@@ -59,9 +59,11 @@ class Help(PermissionCheckerCog):
         embed.add_field(name=f"`{cmd} logs`", value=MSG_FVV166, inline=False)
         embed.add_field(name=f"`benny`", value=MSG_AOB487, inline=False)
         embed.add_field(name=f"`doom`", value=MSG_OTV870, inline=False)
+        embed.add_field(name=f"`clip`", value=MSG_CLP226, inline=False)
+        embed.add_field(name=f"`frags`", value=MSG_FRG471, inline=False)
         embed.add_field(
             name=f"Syntax",
-            value=MSG_RKN680.format(*[f"{PREFIX}render"] * 6),
+            value=MSG_RKN680.format(*[f"{PREFIX}render"] * 10),
             inline=False,
         )
         embed.set_image(url=MSG_CCT908)
@@ -1,6 +1,3 @@
-import asyncio
-from io import BytesIO
-
 import discord
 from discord import TextChannel, Message, File, Attachment
 from discord.errors import Forbidden
@@ -26,11 +23,13 @@ from utils.exception import (
 )
 from utils.logger import LOGGER_BOT, logger_extra, command_logger_render_extract
 from utils.redisconn import REDIS
+from utils.spool import SPOOL
 from utils.strings import *
 from tasks.task_render_dual import task_render_dual
 from rq import Queue
 from rq.job import Job
-from .base import TaskCog, track_task_request
+from bot.dispatcher import JobUpdate
+from .base import DISPATCHER, TRACKER, TaskCog, track_task_request
 
 QUEUE = Queue(name="dual", connection=REDIS)
 
@@ -51,19 +50,18 @@ class RenderDual(TaskCog):
         if not await self._checks(ctx, QUEUE):
             return
 
-        job_ttl = max(QUEUE.count, 1) * self._queue_max_wait_time
+        queue_count = await TRACKER.queue_count(QUEUE.name)
+        job_ttl = max(queue_count, 1) * self._queue_max_wait_time
         attachment: Attachment = message.attachments[0]
 
-        with BytesIO() as buf:
-            await attachment.save(buf)
-            buf.seek(0)
-            job: Job = QUEUE.enqueue(
-                task_render_dual,
-                args=(buf.read(), ctx.author.id),
-                failure_ttl=180,
-                result_ttl=180,
-                ttl=job_ttl,
-            )
+        key = await self._stage_attachment(attachment, job_ttl)
+        job: Job = QUEUE.enqueue(
+            task_render_dual,
+            args=(key, ctx.author.id),
+            failure_ttl=180,
+            result_ttl=180,
+            ttl=job_ttl,
+        )
 
         self._bot.loop.create_task(self._poll_result(ctx, job))
         await self._try_delete_message(message)
@@ -72,61 +70,67 @@ class RenderDual(TaskCog):
     @track_task_request
     async def _poll_result(self, ctx: Context, job: Job):
         ch: TextChannel = ctx.channel
-        position = self._get_job_position(job)
+        position = await self._get_job_position(job)
         embed = self._get_embed(ctx, ORANGE, status="Queued", position=position)
         message: Message = await ch.send(embed=embed)
         status = "Failed"
 
+        updates = DISPATCHER.register(job)
+        last_embed = embed.to_dict()
+
         try:
             while True:
-                position = self._get_job_position(job)
-                status = job.get_status(refresh=True)
+                update: JobUpdate = await updates.get()
+                status = update.status
                 if status == "queued":
-                    embed = self._get_embed(ctx, ORANGE, status="Queued", position=position)
-                    await message.edit(embed=embed)
+                    embed = self._get_embed(
+                        ctx, ORANGE, status="Queued", position=update.position
+                    )
+                    last_embed = await self._edit_embed(message, embed, last_embed)
                 elif status == "started":
                     try:
-                        if progress := job.get_meta(refresh=True).get("progress", None):
+                        if progress := update.progress:
                             progress = round(progress * 10)
                             embed = self._get_embed(
                                 ctx, YELLOW, status="Rendering", per=progress
                             )
-                        elif task_status := job.get_meta(refresh=True).get("status", None):
+                        elif task_status := update.task_status:
                             embed = self._get_embed(ctx, YELLOW, status=task_status)
                         else:
                             embed = self._get_embed(ctx, YELLOW, status="Running")
                     except Exception as e:
                         LOGGER_BOT.error(e, exc_info=e)
-                    await message.edit(embed=embed)
+                    last_embed = await self._edit_embed(message, embed, last_embed)
                 elif status == "finished":
-                    if isinstance(job.result, Exception):
-                        if isinstance(job.result, VersionNotFoundError):
+                    result = await TRACKER.result(job)
+
+                    if isinstance(result, Exception):
+                        if isinstance(result, VersionNotFoundError):
                             err_message = MSG_ANM988
-                        elif isinstance(job.result, UnsupportedBattleTypeError):
+                        elif isinstance(result, UnsupportedBattleTypeError):
                             err_message = MSG_KOL445
-                        elif isinstance(job.result, ReadingError):
+                        elif isinstance(result, ReadingError):
                             err_message = MSG_JYQ473
-                        elif isinstance(job.result, RenderingError):
+                        elif isinstance(result, RenderingError):
                             err_message = MSG_HIY955
-                        elif isinstance(job.result, ArenaIdMismatchError):
+                        elif isinstance(result, ArenaIdMismatchError):
                             err_message = MSG_TOG346
-                        elif isinstance(job.result, MultipleReplaysError):
+                        elif isinstance(result, MultipleReplaysError):
                             err_message = MSG_ATK550
-                        elif isinstance(job.result, NotEnoughReplaysError):
+                        elif isinstance(result, NotEnoughReplaysError):
                             err_message = MSG_MDF285
-                        elif isinstance(job.result, FileNotFoundError):
-                            err_message = str(job.result)
+                        elif isinstance(result, FileNotFoundError):
+                            err_message = str(result)
                         else:
                             err_message = MSG_IBK358
                         embed = self._get_embed(
                             ctx, RED, status="Error", result=err_message
                         )
-                        LOGGER_BOT.error(job.result, exc_info=job.result)
-                    elif isinstance(job.result, tuple):
-                        video_data, random_str, time_taken = job.result
+                        LOGGER_BOT.error(result, exc_info=result)
+                    elif isinstance(result, tuple):
+                        video_key, random_str, time_taken = result
                         try:
-                            with BytesIO(video_data) as reader:
-                                file = File(reader, f"{random_str}.mp4")
+                            file = File(SPOOL.path(video_key), f"{random_str}.mp4")
                             video_msg: Message = await ch.send(file=file, reference=message)
                             attached_file: Attachment = video_msg.attachments[0]
                             result_msg = MSG_LAV349.format(
@@ -161,6 +165,8 @@ class RenderDual(TaskCog):
                                 result=MSG_RHH207.format(formatted_names),
                             )
                             LOGGER_BOT.error(e, exc_info=e, extra=logger_extra(ctx))
+                        finally:
+                            SPOOL.remove(video_key)
                     await message.edit(embed=embed)
                     break
                 elif status == "failed":
@@ -171,9 +177,9 @@ class RenderDual(TaskCog):
                     embed = self._get_embed(ctx, RED, status="Max queue time reached.")
                     await message.edit(embed=embed)
                     break
-                await asyncio.sleep(1)
         except Exception as e:
             LOGGER_BOT.error(e, exc_info=e)
 
-        job.delete()
+        DISPATCHER.unregister(job)
+        await TRACKER.delete(job)
         return status
@@ -0,0 +1,149 @@
+import asyncio
+import json
+from typing import Union
+
+from rq.job import Job
+from utils.logger import LOGGER_BOT
+
+from .tracker import JobTracker
+
+
+class JobUpdate:
+    __slots__ = ["status", "position", "progress", "task_status"]
+
+    def __init__(self):
+        self.status: Union[str, None] = "queued"
+        self.position: int = 1
+        self.progress: Union[float, None] = None
+        self.task_status: Union[str, None] = None
+
+    def copy(self) -> "JobUpdate":
+        update = JobUpdate()
+        for attr in self.__slots__:
+            setattr(update, attr, getattr(self, attr))
+        return update
+
+
+class JobDispatcher:
+    """
+    Watches every job the bot waits on from one coroutine. Progress and task status are pushed by
+    the workers through pub/sub (PROGRESS_CHANNEL). Status changes rq makes on its own (started,
+    finished, failed, expired) and queue positions are read for all jobs in one pipelined round
+    trip per interval. Each job gets an asyncio.Queue and only receives an update when something
+    changed.
+    """
+
+    def __init__(
+        self,
+        tracker: JobTracker,
+        channel: Union[str, None] = None,
+        interval: float = 1.0,
+    ):
+        """
+        :param tracker: Async job tracker.
+        :param channel: Pub/sub channel the workers publish to. None reads the job meta instead.
+        :param interval: Seconds between status sweeps.
+        """
+        self._tracker = tracker
+        self._channel = channel
+        self._interval = interval
+        self._jobs: dict[str, tuple[Job, JobUpdate, asyncio.Queue]] = {}
+        self._running = False
+
+    def register(self, job: Job) -> asyncio.Queue:
+        """
+        Starts watching a job.
+        :param job: Enqueued job.
+        :return: Queue receiving a JobUpdate on every change.
+        """
+        updates = asyncio.Queue()
+        self._jobs[job.id] = job, JobUpdate(), updates
+        return updates
+
+    def unregister(self, job: Job):
+        self._jobs.pop(job.id, None)
+
+    async def run(self):
+        if self._running:
+            return
+        self._running = True
+        pubsub = None
+
+        try:
+            if self._channel:
+                pubsub = self._tracker.connection.pubsub()
+                await pubsub.subscribe(self._channel)
+
+            while True:
+                try:
+                    await self._sweep()
+
+                    if pubsub:
+                        await self._listen(pubsub)
+                    else:
+                        await asyncio.sleep(self._interval)
+                except Exception as e:
+                    LOGGER_BOT.error(e, exc_info=e)
+                    await asyncio.sleep(self._interval)
+        finally:
+            self._running = False
+
+            if pubsub:
+                await pubsub.close()
+
+    async def _listen(self, pubsub):
+        """
+        Handles pushed updates until the next sweep is due.
+        """
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + self._interval
+
+        while (timeout := deadline - loop.time()) > 0:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=timeout
+            )
+
+            if not message:
+                continue
+
+            data = json.loads(message["data"])
+
+            if data["id"] not in self._jobs:
+                continue
+
+            _, current, updates = self._jobs[data["id"]]
+            new = current.copy()
+            new.progress = data["progress"]
+            new.task_status = data["status"]
+
+            # The publish can arrive before the sweep sees the job started.
+            if new.status == "queued":
+                new.status = "started"
+            self._set(data["id"], new)
+
+    async def _sweep(self):
+        states = await self._tracker.states([job for job, _, _ in self._jobs.values()])
+
+        for job_id, state in states.items():
+            if job_id not in self._jobs:
+                continue
+
+            _, current, _ = self._jobs[job_id]
+            new = current.copy()
+            new.status = state.status
+            new.position = state.position
+
+            if not self._channel:
+                new.progress = state.meta.get("progress", None)
+                new.task_status = state.meta.get("status", None)
+            self._set(job_id, new)
+
+    def _set(self, job_id: str, new: JobUpdate):
+        _, current, updates = self._jobs[job_id]
+
+        if all(getattr(new, a) == getattr(current, a) for a in JobUpdate.__slots__):
+            return
+
+        self._jobs[job_id] = self._jobs[job_id][0], new, updates
+        updates.put_nowait(new)
+
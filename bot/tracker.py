@@ -0,0 +1,122 @@
+from typing import Any, Union
+
+from rq import Queue
+from rq.job import Job
+from rq.registry import (
+    CanceledJobRegistry,
+    DeferredJobRegistry,
+    FailedJobRegistry,
+    FinishedJobRegistry,
+    ScheduledJobRegistry,
+    StartedJobRegistry,
+)
+from rq.serializers import DefaultSerializer
+from rq.worker_registration import WORKERS_BY_QUEUE_KEY
+
+REGISTRIES = (
+    CanceledJobRegistry,
+    DeferredJobRegistry,
+    FailedJobRegistry,
+    FinishedJobRegistry,
+    ScheduledJobRegistry,
+    StartedJobRegistry,
+)
+
+
+class JobState:
+    __slots__ = ["status", "position", "meta"]
+
+    def __init__(self, status: Union[str, None], position: int, meta: dict):
+        self.status = status
+        self.position = position
+        self.meta = meta
+
+
+class JobTracker:
+    """
+    Reads and cleans up rq jobs, queues and workers through an async Redis client, using the
+    same keys and serializer as rq's synchronous API so the event loop is never blocked.
+    """
+
+    def __init__(self, connection):
+        """
+        :param connection: Async Redis client (aioredis).
+        """
+        self._connection = connection
+
+    @property
+    def connection(self):
+        return self._connection
+
+    async def queue_count(self, queue_name: str) -> int:
+        return await self._connection.llen(Queue.redis_queue_namespace_prefix + queue_name)
+
+    async def worker_count(self, queue_name: str) -> int:
+        return await self._connection.scard(WORKERS_BY_QUEUE_KEY % queue_name)
+
+    async def position(self, job: Job) -> int:
+        """
+        1 based position of the job in its queue, 1 when it is not queued anymore.
+        :param job: The job.
+        :return:
+        """
+        return (await self.states([job]))[job.id].position
+
+    async def states(self, jobs: list[Job]) -> dict[str, JobState]:
+        """
+        Status, queue position and meta of the jobs, fetched in one pipelined round trip.
+        :param jobs: Jobs to fetch.
+        :return: Job id -> JobState.
+        """
+        if not jobs:
+            return {}
+
+        queue_names = list({job.origin for job in jobs})
+
+        async with self._connection.pipeline(transaction=False) as pipe:
+            for job in jobs:
+                pipe.hmget(Job.key_for(job.id), "status", "meta")
+            for queue_name in queue_names:
+                pipe.lrange(Queue.redis_queue_namespace_prefix + queue_name, 0, -1)
+            results = await pipe.execute()
+
+        queued = {
+            queue_name: [i.decode() for i in job_ids]
+            for queue_name, job_ids in zip(queue_names, results[len(jobs):])
+        }
+        states = {}
+
+        for job, (status, meta) in zip(jobs, results):
+            try:
+                position = queued[job.origin].index(job.id) + 1
+            except ValueError:
+                position = 1
+
+            states[job.id] = JobState(
+                status.decode() if status else None,
+                position,
+                DefaultSerializer.loads(meta) if meta else {},
+            )
+        return states
+
+    async def result(self, job: Job) -> Any:
+        """
+        The job's return value.
+        :param job: Finished job.
+        :return:
+        """
+        if data := await self._connection.hget(Job.key_for(job.id), "result"):
+            return DefaultSerializer.loads(data)
+        return None
+
+    async def delete(self, job: Job):
+        """
+        Removes the job from its queue and registries and deletes its keys, like Job.delete.
+        :param job: The job.
+        """
+        async with self._connection.pipeline(transaction=False) as pipe:
+            pipe.lrem(Queue.redis_queue_namespace_prefix + job.origin, 1, job.id)
+            for registry in REGISTRIES:
+                pipe.zrem(registry.key_template.format(job.origin), job.id)
+            pipe.delete(job.key, job.dependents_key, job.dependencies_key)
+            await pipe.execute()
@@ -0,0 +1,14 @@
+import shutil
+import sys
+from os.path import join
+
+from renderer.assets import ASSETS, MANIFEST
+
+# Moves a version's resources into the asset store, e.g.
+# python -m generation.store_resources 0_10_11
+for version in sys.argv[1:]:
+    version_dir = join('renderer', 'versions', version)
+    resources_dir = join(version_dir, 'resources')
+    added = ASSETS.add_tree(resources_dir, join(version_dir, MANIFEST))
+    shutil.rmtree(resources_dir)
+    print(f"{version}: {added} new blobs.")
@@ -0,0 +1,131 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+from importlib import resources
+from typing import BinaryIO, TextIO, Union
+
+MANIFEST = "resources.json"
+
+
+class AssetStore:
+    """
+    Content addressed store for the resources of the game versions. A version package has a
+    manifest (resources.json) mapping its resource names to blobs named after their sha256, so the
+    assets most versions share are stored once and, in a warm worker, decoded and cached once.
+    Packages without a manifest (renderer.shared) are read through importlib.resources.
+    """
+
+    def __init__(self, directory: str):
+        """
+        :param directory: Blob directory.
+        """
+        self._directory = directory
+        self._manifests: dict[str, dict[str, str]] = {}
+        self._digests: dict[tuple[str, str], str] = {}
+
+    def manifest(self, version_package: str) -> dict[str, str]:
+        """
+        :param version_package: Version package, e.g. renderer.versions.0_10_11.
+        :return: Resource name -> blob, empty if the version has no manifest.
+        """
+        if (manifest := self._manifests.get(version_package)) is None:
+            try:
+                manifest = json.loads(resources.read_text(version_package, MANIFEST))
+            except (FileNotFoundError, ModuleNotFoundError):
+                manifest = {}
+            self._manifests[version_package] = manifest
+        return manifest
+
+    def blob(self, package: str, name: str) -> Union[str, None]:
+        """
+        Blob of a resource.
+        :param package: Resource package, e.g. renderer.versions.0_10_11.resources.spaces.05_Ring.
+        :param name: Resource name.
+        :return: Blob name, None if the package isn't stored (shared resources).
+        :raises FileNotFoundError: The version has no such resource.
+        """
+        version_package, sep, sub_package = package.partition(".resources")
+
+        if not sep or (sub_package and not sub_package.startswith(".")):
+            return None
+
+        if not (manifest := self.manifest(version_package)):
+            return None
+
+        resource = "/".join([*sub_package.split(".")[1:], name])
+
+        try:
+            return manifest[resource]
+        except KeyError:
+            raise FileNotFoundError(f"{resource} not found in {version_package}.")
+
+    def digest(self, package: str, name: str) -> str:
+        """
+        Content hash of a resource, its blob or, for shared resources, the sha256 of the file.
+        :param package: Resource package.
+        :param name: Resource name.
+        :return: Digest.
+        """
+        if blob := self.blob(package, name):
+            return blob
+
+        if (digest := self._digests.get((package, name))) is None:
+            digest = hashlib.sha256(resources.read_binary(package, name)).hexdigest()
+            self._digests[package, name] = digest
+        return digest
+
+    def open_binary(self, package: str, name: str) -> BinaryIO:
+        if blob := self.blob(package, name):
+            return open(os.path.join(self._directory, blob), "rb")
+        return resources.open_binary(package, name)
+
+    def read_text(self, package: str, name: str) -> str:
+        if blob := self.blob(package, name):
+            with open(os.path.join(self._directory, blob), encoding="utf-8") as f:
+                return f.read()
+        return resources.read_text(package, name)
+
+    def open_text(self, package: str, name: str) -> TextIO:
+        return io.StringIO(self.read_text(package, name))
+
+    def add_tree(self, resources_dir: str, manifest_path: str) -> int:
+        """
+        Stores a resource tree and writes its manifest. Python files are skipped.
+        :param resources_dir: Directory of the resources (a version's resources package).
+        :param manifest_path: Manifest to write.
+        :return: Number of new blobs.
+        """
+        os.makedirs(self._directory, exist_ok=True)
+        manifest = {}
+        added = 0
+
+        for root, dirs, files in os.walk(resources_dir):
+            dirs[:] = [d for d in dirs if d != "__pycache__"]
+
+            for file in files:
+                if file.endswith((".py", ".pyc")):
+                    continue
+
+                file_path = os.path.join(root, file)
+
+                with open(file_path, "rb") as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()
+
+                blob = f"{digest}{os.path.splitext(file)[1]}"
+                blob_path = os.path.join(self._directory, blob)
+
+                if not os.path.exists(blob_path):
+                    shutil.copyfile(file_path, blob_path)
+                    added += 1
+
+                resource = os.path.relpath(file_path, resources_dir)
+                manifest[resource.replace(os.sep, "/")] = blob
+
+        with open(manifest_path, "w") as f:
+            json.dump(dict(sorted(manifest.items())), f, indent=1)
+        return added
+
+
+ASSETS = AssetStore(os.path.join(os.path.dirname(__file__), "blobs"))
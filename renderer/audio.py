@@ -0,0 +1,79 @@
+import os
+from typing import Union
+
+
+class AudioPlan:
+    """
+    Audio inputs, filter graph and mapping for the ffmpeg process that encodes the frames.
+    Input 0 is the piped video, so the audio inputs are referenced from [1] on.
+    """
+
+    __slots__ = ["inputs", "filter_complex", "map", "output_params"]
+
+    def __init__(
+        self,
+        inputs: list[str],
+        filter_complex: Union[str, None] = None,
+        audio_map: str = "1:a:0",
+        output_params: Union[list[str], None] = None,
+    ):
+        self.inputs: list[str] = inputs
+        self.filter_complex: Union[str, None] = filter_complex
+        self.map: str = audio_map
+        self.output_params: list[str] = output_params if output_params else []
+
+    def get_args(self) -> tuple[list[str], list[str]]:
+        """
+        ffmpeg arguments.
+        :return: Input arguments, output arguments.
+        """
+        input_args = []
+
+        for audio_input in self.inputs:
+            input_args += ["-i", audio_input]
+
+        output_args = []
+
+        if self.filter_complex:
+            output_args += ["-filter_complex", self.filter_complex]
+
+        output_args += ["-map", "0:v:0", "-map", self.map]
+        output_args += self.output_params
+        return input_args, output_args
+
+
+def plan_benny(bgm: str) -> Union[AudioPlan, None]:
+    """
+    Background music, cut to the video's length.
+    :param bgm: Music file.
+    :return:
+    """
+    if not os.path.exists(bgm):
+        return None
+
+    return AudioPlan([bgm], output_params=["-shortest"])
+
+
+def plan_doom(
+    doom: str, elevator: str, frag_time: float, drop: float = 4.708
+) -> Union[AudioPlan, None]:
+    """
+    Elevator music fading out as the doom track drops on the owner's first frag.
+    :param doom: Doom track.
+    :param elevator: Elevator music.
+    :param frag_time: Video time of the first frag in seconds.
+    :param drop: Time from the start of the doom track to the drop in seconds.
+    :return:
+    """
+    if not os.path.exists(doom) or not os.path.exists(elevator):
+        return None
+
+    sync_time = max(frag_time - drop, 0)
+    delay = round(sync_time * 1000)
+    filter_complex = (
+        f"[1]adelay={delay}|{delay}[a];"
+        f"[2]afade=t=out:st={sync_time}:d={drop}[b];[a][b]amix[out]"
+    )
+    return AudioPlan(
+        [doom, elevator], filter_complex, "[out]", output_params=["-shortest"]
+    )
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from os import getenv
+from typing import Union
+
+from PIL import Image
+
+BAKE_VERSION = 1
+
+
+class MapBake:
+    """
+    Composed minimaps and info panel backgrounds stored on disk as raw pixels. A work horse is
+    forked for every job, so the process-level cache is empty each time; with the bake a map
+    load is one file read instead of decoding, resizing and compositing the resources again.
+    Entries are keyed by BAKE_VERSION, the content of the map's resources and the legends and the
+    render mode, so updated assets are baked again; changes to the compositing itself bump
+    BAKE_VERSION. Entries not loaded within the ttl are removed.
+    """
+
+    def __init__(self, directory: Union[str, None], ttl: int = 7 * 24 * 3600):
+        """
+        :param directory: Bake directory, None disables the bake.
+        :param ttl: Seconds a bake is kept after it was last loaded.
+        """
+        self._directory = directory
+        self._ttl = ttl
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: tuple) -> str:
+        name = hashlib.sha256(json.dumps(key).encode()).hexdigest()
+        return os.path.join(self._directory, f"{name}.bake")
+
+    def load(self, key: tuple) -> Union[tuple, None]:
+        """
+        Reads a baked map.
+        :param key: Bake key.
+        :return: minimap, info panel, background color, scaling x and scaling y. None if the map
+        isn't baked (or the file is from another bake version or incomplete).
+        """
+        if not self._directory:
+            return None
+
+        path = self.path(key)
+
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+
+                if header["version"] != BAKE_VERSION:
+                    return None
+
+                images = [
+                    Image.frombytes(mode, tuple(size), f.read(length))
+                    for mode, size, length in header["images"]
+                ]
+            # Keeps it from expiring.
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            return None
+
+        bg_color = header["bg_color"]
+        bg_color = tuple(bg_color) if isinstance(bg_color, list) else bg_color
+        return (*images, bg_color, *header["scaling"])
+
+    def save(
+        self,
+        key: tuple,
+        minimap: Image.Image,
+        info_panel: Image.Image,
+        bg_color: Union[tuple, int],
+        scaling_x: float,
+        scaling_y: float,
+    ):
+        """
+        Bakes a map. Palette images are not baked, their raw pixels don't carry the palette.
+        :param key: Bake key.
+        :param minimap: Minimap.
+        :param info_panel: Info panel background.
+        :param bg_color: Background color.
+        :param scaling_x: Scaling factor for x coordinates.
+        :param scaling_y: Scaling factor for y coordinates.
+        """
+        if not self._directory or "P" in (minimap.mode, info_panel.mode):
+            return
+
+        data = [minimap.tobytes(), info_panel.tobytes()]
+        header = {
+            "version": BAKE_VERSION,
+            "images": [
+                [image.mode, image.size, len(raw)]
+                for image, raw in zip((minimap, info_panel), data)
+            ],
+            "bg_color": bg_color,
+            "scaling": [scaling_x, scaling_y],
+        }
+        fd, temp_path = tempfile.mkstemp(suffix=".part", dir=self._directory)
+
+        # Written aside then moved, so concurrent jobs never read a partial bake.
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(header).encode() + b"\n")
+
+                for raw in data:
+                    f.write(raw)
+
+            os.replace(temp_path, self.path(key))
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def cleanup(self):
+        """
+        Removes the bakes (and leftover partial files) older than the ttl.
+        """
+        if not self._directory:
+            return
+
+        expired = time.time() - self._ttl
+
+        for entry in os.scandir(self._directory):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < expired:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+MAP_BAKE = MapBake(
+    getenv("MAP_BAKE_DIR") or os.path.join(tempfile.gettempdir(), "renderer-bake"),
+    int(getenv("MAP_BAKE_TTL") or 7 * 24 * 3600),
+)
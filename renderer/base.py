@@ -1,30 +1,27 @@
 import json
-import math
-import subprocess
-import tempfile
 import time
 from collections import namedtuple
-from importlib.resources import open_binary, open_text, path, read_text
+from importlib.resources import path
 from math import ceil
 from typing import Generator, Union
 
-from imageio_ffmpeg import get_ffmpeg_exe, write_frames
 from lxml import etree
 from PIL import Image, ImageDraw, ImageFont
 from PIL.ImageFont import FreeTypeFont
 from rq.job import Job
 
+from renderer.cache import SHARED_CACHE, SpriteCache
 from renderer.constants import *
 from renderer.data import (
     Achievement,
     Capture,
-    DataShare,
     Death,
     Plane,
     ReplayData,
     Ribbon,
     Score,
     Ship,
+    States,
     Ward,
     Weather,
 )
@@ -32,21 +29,46 @@ from renderer.helpers import (
     catch_exception,
     catch_exception_non_generator,
     check_trim,
-    delete_temp_files,
     draw_grid,
     generate_holder,
     generate_torus,
     get_map_size,
     load_image,
     memoize,
-    memoize_image_gen,
     paste_args,
     paste_args_centered,
     paste_centered,
     replace_color,
 )
+from renderer.assets import ASSETS
+from renderer.audio import AudioPlan, plan_benny, plan_doom
+from renderer.bake import BAKE_VERSION, MAP_BAKE
+from renderer.budget import RenderPlan, plan_render
+from renderer.clips import get_owner_death_time, select_events, select_window
+from renderer.pipeline import EncodeStage, StageStats
+from renderer.profiler import Profiler
+from renderer.progress import ProgressReporter
+from renderer.stream import StateStream
+from renderer.text import draw_text, text_size
+from renderer.visibility import Observer, VisibilityTable, get_observations
+from renderer.writer import EncoderProfile, FFmpegWriter
 from rq import get_current_job
 
+# Layers timed when profiling (recorded without the _layer_ prefix).
+PROFILED_LAYERS = (
+    "_layer_caps",
+    "_layer_wards",
+    "_layer_ships",
+    "_layer_planes",
+    "_layer_score",
+    "_layer_score_timer",
+    "_layer_weather",
+    "_layer_damage",
+    "_layer_ribbon",
+    "_layer_achievement",
+    "_layer_death",
+)
+
 
 class RendererBase:
     def __init__(
@@ -59,17 +81,35 @@ class RendererBase:
         dual=False,
         as_enemy=False,
         doom=False,
-        share: Union[dict, None] = None,
+        share: Union[VisibilityTable, None] = None,
+        encoder: Union[EncoderProfile, None] = None,
+        progress: Union[ProgressReporter, None] = None,
+        budget: Union[float, None] = None,
+        window: Union[tuple[int, int], None] = None,
+        focus=False,
+        profiler: Union[Profiler, None] = None,
+        stream: Union[StateStream, None] = None,
     ):
         self._replay_data = replay_data
         self._fps = 60 if benny else fps
         self._quality = quality
+        self._encoder = encoder if encoder else EncoderProfile.from_quality(quality)
         self._logs = logs
         self._benny = benny
         self._dual = dual
         self._as_enemy = as_enemy
         self._doom = doom
-        self._share: dict[int, DataShare] = share
+        self._budget = budget
+        self._window = window
+        self._focus = focus
+        self._profiler = profiler
+        self._stream = stream
+        # A stream renders every state, its selection is only known once it's played.
+        self._selection: list[int] = [] if stream else self._get_selection()
+        self._plan = RenderPlan(preset=self._encoder.preset)
+        # the last frame is shown for 60 frames.
+        self._hold_end = 59 / self._fps
+        self._share: Union[VisibilityTable, None] = share
         self._res_package = f"{__package__}.resources"
         self._shared_res_package = f"{__package__}.shared"
         # colors
@@ -102,52 +142,238 @@ class RendererBase:
                 self._relations = RELATION_DUAL_ENEMY_STR
             else:
                 self._relations = RELATION_DUAL_ALLY_STR
-        self._iterations = 0
         self._logs_y = 0
         self._tiers_roman = TIERS
         self._death_types: dict[int, dict] = {}
-        # player's initial state
-        self._player_pos_x: int = 0
-        self._player_pos_y: int = 0
-        self._player_plane_pos_x: int = 0
-        self._player_plane_pos_y: int = 0
-        self._player_view_range: int = 0
-        self._player_is_alive: bool = True
-        # output
-        self._temp_output_path = tempfile.NamedTemporaryFile(
-            "w", delete=False, suffix=".mp4"
-        ).name
+        # player's ship and squadron
+        self._observer = Observer()
+        self._clock: int = 0
         # cache
-        self._cache = {}
-        self._cache_max_it = 10
+        # the shared cache outlives renderers, its stats are reported since this point.
+        self._shared_stats = SHARED_CACHE.stats()
+        self._cache = SpriteCache()
         # weather
         self._weather: Union[Weather, None] = None
         self._job: Job = get_current_job()
+        self._progress = progress if progress else ProgressReporter(self._job)
 
-    def start(self) -> bytes:
+    def start(self, output_path: str):
+        """
+        Renders the replay to a video.
+        :param output_path: Destination of the video (mp4).
+        """
         assert not all([self._doom, self._benny])
         assert not self._dual or not self._as_enemy
         assert not self._share
 
+        t1 = time.perf_counter()
         self._load_map()
         self._load_fonts()
         self._get_used_ships()
         self._get_used_planes()
         self._get_player_initial_state()
         self._load_death_icons()
-        writer = self._get_writer()
-        last_key = list(self._replay_data.states.keys())[-1]
-        states_len = len(self._replay_data.states)
-        writer.send(None)
 
-        for idx, (_time, states) in enumerate(self._replay_data.states.items()):
+        if self._stream:
+            frames, states_len = self._iter_stream(), 0
+        else:
+            self._plan = self._get_render_plan()
+            states_all = list(self._replay_data.states.values())
+            frames = [states_all[i] for i in self._selection][:: self._plan.stride]
+            states_len = len(frames)
+
+        writer = self._get_writer(output_path)
+        writer.open()
+        encoder = EncodeStage(writer)
+        encoder.start()
+        t2 = time.perf_counter()
+
+        if self._profiler:
+            self._profiler.add("setup", t2 - t1)
+            self._profiler.instrument(self, *PROFILED_LAYERS, prefix="_layer_")
+            self._progress.flush = self._profiler.timed(
+                "save_meta", self._progress.flush
+            )
+
+        minimap = None
+        last_minimap_key = last_frame_key = None
+        reused_minimaps = reused_frames = 0
+
+        try:
+            for idx, states in enumerate(frames):
+                self._weather = states.weather
+                self._observer.update(states)
+                minimap_key = self._get_minimap_key(states)
+                frame_key = self._get_frame_key(states, minimap_key)
+
+                if frame_key == last_frame_key:
+                    encoder.put(None)
+                    reused_frames += 1
+                    self._progress.update(progress=self._get_done(idx, states_len))
+                    continue
+
+                info_panel = self._img_info_panel.copy()
+
+                draw_text(info_panel, (5, 5), states.time, self._font_time)
+
+                if self._replay_data.match.battle_type != 14:
+                    info_panel.paste(*self._layer_score(states.score))
+                    info_panel.paste(
+                        *self._layer_score_timer(states.score, states.captures)
+                    )
+
+                if weather_info_image := self._layer_weather(states.weather):
+                    info_panel.paste(*weather_info_image)
+
+                if self._logs:
+                    _logs = [
+                        self._layer_damage(
+                            states.damage, states.damage_agro, states.damage_spot
+                        ),
+                        self._layer_ribbon(states.ribbon),
+                        self._layer_achievement(states.achievement),
+                        self._layer_death(states.deaths),
+                    ]
+
+                    for _log in _logs:
+                        if _log:
+                            info_panel.paste(*_log)
+
+                if minimap_key == last_minimap_key:
+                    reused_minimaps += 1
+                else:
+                    minimap = self._img_minimap.copy()
+                    generators = [
+                        self._layer_caps(states.captures),
+                        self._layer_wards(states.wards),
+                        self._layer_ships(states.ships),
+                        self._layer_planes(states.planes),
+                    ]
+
+                    for generator in generators:
+                        for args in generator:
+                            if args:
+                                minimap.paste(*args)
+
+                info_panel.paste(minimap, (0, 50))
+                encoder.put(info_panel)
+                last_minimap_key, last_frame_key = minimap_key, frame_key
+                self._progress.update(progress=self._get_done(idx, states_len))
+
+            compose_time = time.perf_counter() - t2
+            encoder.close()
+            writer.close()
+        except BaseException:
+            # No ffmpeg process or partial video is left behind.
+            encoder.abort()
+            raise
+
+        parse_time = 0.0
+
+        if self._stream:
+            parse_time = self._stream.elapsed
+            states_len = len(self._replay_data.states)
+            self._selection = self._get_selection()
+            self._plan.predicted = self._get_render_plan().predicted
+
+        self._job.meta["dedup"] = {
+            "minimap": reused_minimaps / states_len,
+            "frame": reused_frames / states_len,
+        }
+        self._job.meta["cache"] = self.get_cache_stats()
+        self._job.meta["budget"] = {
+            **self._plan.to_dict(),
+            "budget": self._budget,
+            "actual": time.perf_counter() - t1,
+        }
+        self._job.meta["pipeline"] = {
+            "compose": StageStats(
+                states_len, compose_time - encoder.blocked - parse_time, encoder.blocked
+            ).to_dict(),
+            "encode": encoder.stats.to_dict(),
+        }
+
+        if self._stream:
+            self._job.meta["pipeline"]["parse"] = StageStats(
+                states_len, parse_time
+            ).to_dict()
+
+        if self._profiler:
+            if self._stream:
+                self._profiler.add("parse", parse_time)
+
+            self._profiler.add("compose", compose_time - parse_time)
+            self._profiler.add("encode", encoder.stats.busy)
+            self._profiler.counters.update(
+                frames={
+                    "total": states_len,
+                    "written": writer.frames_written,
+                    "reused_minimaps": reused_minimaps,
+                    "reused_frames": reused_frames,
+                },
+                cache=self._job.meta["cache"],
+                pipeline=self._job.meta["pipeline"],
+            )
+        self._progress.flush()
+
+    @staticmethod
+    def _get_minimap_key(states: States) -> int:
+        """
+        Hash of everything drawn on the minimap. Equal keys mean an identical minimap.
+        :param states: Current states.
+        :return:
+        """
+        return hash(
+            (
+                tuple(states.ships.values()),
+                tuple(states.planes.values()),
+                tuple(states.wards.values()),
+                tuple(states.captures),
+                states.weather,
+            )
+        )
+
+    def _get_frame_key(self, states: States, minimap_key: int) -> int:
+        """
+        Hash of everything drawn on the frame. Equal keys mean an identical frame.
+        :param states: Current states.
+        :param minimap_key: Minimap hash.
+        :return:
+        """
+        to_hash = [minimap_key, states.time, states.score]
+
+        if self._logs:
+            to_hash += [
+                states.damage,
+                states.damage_agro,
+                states.damage_spot,
+                states.ribbon,
+                tuple(states.achievement),
+                tuple(states.deaths),
+            ]
+        return hash(tuple(to_hash))
+
+    def generator(self):
+        """
+        The ally side of a dual render, as full frames.
+        """
+        assert self._dual
+        assert not self._as_enemy
+        assert isinstance(self._share, VisibilityTable)
+        assert not self._benny
+        assert not self._doom
+        assert not self._logs
+
+        self._load_dual()
+
+        for self._clock, states in self._replay_data.states.items():
             self._weather = states.weather
+            self._observer.update(states)
 
             minimap = self._img_minimap.copy()
             info_panel = self._img_info_panel.copy()
 
-            info_panel_draw = ImageDraw.Draw(info_panel)
-            info_panel_draw.text((5, 5), text=states.time, font=self._font_time)
+            draw_text(info_panel, (5, 5), states.time, self._font_time)
 
             if self._replay_data.match.battle_type != 14:
                 info_panel.paste(*self._layer_score(states.score))
@@ -155,7 +381,10 @@ class RendererBase:
                     *self._layer_score_timer(states.score, states.captures)
                 )
 
-            if weather_info_image := self._layer_weather(states.weather):
+            if (
+                weather_info_image := self._layer_weather(states.weather)
+                and not self._dual
+            ):
                 info_panel.paste(*weather_info_image)
 
             generators = [
@@ -165,99 +394,38 @@ class RendererBase:
                 self._layer_planes(states.planes),
             ]
 
-            if self._logs:
-                _logs = [
-                    self._layer_damage(
-                        states.damage, states.damage_agro, states.damage_spot
-                    ),
-                    self._layer_ribbon(states.ribbon),
-                    self._layer_achievement(states.achievement),
-                    self._layer_death(states.deaths),
-                ]
-
-                for _log in _logs:
-                    if _log:
-                        info_panel.paste(*_log)
-
             for generator in generators:
                 for args in generator:
                     if args:
                         minimap.paste(*args)
 
             info_panel.paste(minimap, (0, 50))
+            yield info_panel
 
-            if last_key == _time:
-                for _ in range(0, 60):
-                    writer.send(info_panel.__array__())
-            else:
-                writer.send(info_panel.__array__())
-
-            self._job.meta["progress"] = (idx + 1) / states_len
-            self._job.save_meta()
-
-            self._delete_expired()
-            self._iterations += 1
-        writer.close()
-
-        with open(self._temp_output_path, "rb") as f:
-            video_data = f.read()
-
-        if self._doom and self._replay_data.owner_frag_times:
-            doomed = tempfile.NamedTemporaryFile("w", delete=False, suffix=".mp4").name
-            drop = 4.708
-            actual_kill = self._replay_data.owner_frag_times[0] / self._fps
-            sync_time = actual_kill - drop
-
-            with path(self._shared_res_package, "elevator.mp3") as elevator_path:
-                elevator_bgm = str(elevator_path.absolute())
-
-            with path(self._shared_res_package, "doom.mp3") as doom_path:
-                doom_bgm = str(doom_path)
-
-            _filter = (
-                f"[1]adelay={round(sync_time * 1000)}|{round(sync_time * 1000)}[a];"
-                f"[2]afade=t=out:st={sync_time}:d={drop}[b];[a][b]amix[out]"
-            )
+    def sprites(self) -> Generator[list[tuple], None, None]:
+        """
+        The enemy side of a dual render. Only its wards, ships and planes are drawn, so they are
+        yielded as (image, minimap position) to be composited onto the ally frame instead of
+        being pasted onto a transparent frame of their own.
+        """
+        assert self._dual
+        assert self._as_enemy
+        assert isinstance(self._share, VisibilityTable)
 
-            subprocess.run(
-                [
-                    get_ffmpeg_exe(),
-                    "-i",
-                    self._temp_output_path,
-                    "-i",
-                    doom_bgm,
-                    "-i",
-                    elevator_bgm,
-                    "-filter_complex",
-                    _filter,
-                    "-map",
-                    "0:v:0",
-                    "-map",
-                    "[out]",
-                    "-c:v",
-                    "copy",
-                    "-shortest",
-                    "-y",
-                    "-loglevel",
-                    "quiet",
-                    doomed,
-                ],
-                text=True,
-            )
+        self._load_dual()
 
-            with open(doomed, "rb") as f:
-                video_data = f.read()
-            delete_temp_files(doomed)
-        delete_temp_files(self._temp_output_path)
-        return video_data
+        for self._clock, states in self._replay_data.states.items():
+            self._weather = states.weather
+            self._observer.update(states)
 
-    def generator(self):
-        assert self._dual
-        assert isinstance(self._share, dict)
-        assert not self._benny
-        assert not self._doom
-        assert not self._logs
+            generators = [
+                self._layer_wards(states.wards),
+                self._layer_ships(states.ships),
+                self._layer_planes(states.planes),
+            ]
+            yield [args[:2] for generator in generators for args in generator if args]
 
+    def _load_dual(self):
         self._load_map()
         self._load_fonts()
         self._get_used_ships()
@@ -265,56 +433,95 @@ class RendererBase:
         self._get_player_initial_state()
         self._load_death_icons()
 
-        for _time, states in self._replay_data.states.items():
-            self._weather = states.weather
+    def get_total(self) -> int:
+        """
+        Number of states rendered, after the time window/focus selection. Unknown (0) for a
+        stream until it is played.
+        """
+        return len(self._selection)
 
-            minimap = self._img_minimap.copy()
-            info_panel = self._img_info_panel.copy()
+    def _iter_stream(self) -> Generator[States, None, None]:
+        """
+        The stream's states. Players who join the battle after it started are set up as they
+        show up.
+        """
+        for states in self._stream:
+            if len(self._info_ships) != len(self._replay_data.players):
+                self._get_used_ships()
+            yield states
 
-            if not self._as_enemy:
-                info_panel_draw = ImageDraw.Draw(info_panel)
-                info_panel_draw.text((5, 5), text=states.time, font=self._font_time)
+    def _get_done(self, idx: int, total: int) -> float:
+        """
+        Share of the render done after a frame. A stream goes by the share of the replay played.
+        :param idx: Frame index.
+        :param total: Number of frames.
+        :return:
+        """
+        return self._stream.played if self._stream else (idx + 1) / total
 
-            if self._replay_data.match.battle_type != 14:
-                if not self._as_enemy:
-                    info_panel.paste(*self._layer_score(states.score))
-                    info_panel.paste(
-                        *self._layer_score_timer(states.score, states.captures)
-                    )
+    def _get_selection(self) -> list[int]:
+        """
+        Indices of the states to render: a battle timer window, the seconds around the owner's
+        frags and death, or everything.
+        :return:
+        """
+        clock = list(self._replay_data.states)
 
-            if (
-                weather_info_image := self._layer_weather(states.weather)
-                and not self._dual
-                and not self._as_enemy
-            ):
-                info_panel.paste(*weather_info_image)
+        if self._window:
+            return select_window(clock, *self._window)
 
-            if self._as_enemy:
-                generators = [
-                    self._layer_wards(states.wards),
-                    self._layer_ships(states.ships),
-                    self._layer_planes(states.planes),
-                ]
-            else:
-                generators = [
-                    self._layer_caps(states.captures),
-                    self._layer_wards(states.wards),
-                    self._layer_ships(states.ships),
-                    self._layer_planes(states.planes),
-                ]
+        if self._focus:
+            times = list(self._replay_data.owner_frag_times)
+            states = list(self._replay_data.states.values())
 
-            for generator in generators:
-                for args in generator:
-                    if args:
-                        minimap.paste(*args)
+            if (death_time := get_owner_death_time(clock, states)) is not None:
+                times.append(death_time)
+            return select_events(clock, times)
+        return list(range(len(clock)))
 
-            info_panel.paste(minimap, (0, 50))
-            self._delete_expired()
-            self._iterations += 1
-            yield info_panel.copy()
+    def _get_render_plan(self) -> RenderPlan:
+        """
+        Frame stride, output scale and encoder preset predicted to fit the time budget.
+        :return:
+        """
+        states = list(self._replay_data.states.values())
+        entities = [
+            len(s.ships) + len(s.planes) + len(s.wards) + len(s.captures)
+            for s in (states[i] for i in self._selection)
+        ]
+        return plan_render(
+            total=self.get_total(),
+            entities=sum(entities) / len(entities) if entities else 0,
+            size=self._img_info_panel.size,
+            logs=self._logs,
+            preset=self._encoder.preset,
+            budget=self._budget,
+        )
 
-    def get_total(self) -> int:
-        return len(self._replay_data.states)
+    def get_observations(self) -> dict[int, dict[int, int]]:
+        """
+        Ships in the owner's range per tick, for VisibilityTable.merge.
+        :return:
+        """
+        si: dict[str, dict] = json.load(
+            ASSETS.open_text(self._res_package, "info_ship.json")
+        )
+        owner = self._replay_data.players[self._replay_data.match.owner_avatar_id]
+        view_range = si[str(owner.ship_params_id)]["visibility_coef"]
+        return get_observations(self._replay_data, view_range)
+
+    def get_cache_stats(self) -> dict:
+        return {
+            "local": self._cache.stats(),
+            "shared": SHARED_CACHE.stats(since=self._shared_stats),
+        }
+
+    @property
+    def _cache_scope(self) -> tuple:
+        """
+        Scope of the entries this renderer puts in the process-level cache.
+        """
+        return self._res_package, self._dual, self._as_enemy
 
     ##############
     # SHIP LAYER #
@@ -327,22 +534,37 @@ class RendererBase:
         :param ship_state:
         :return:
         """
-        for ship in sorted(
-            ship_state.values(), key=lambda s: (s.is_alive, s.is_visible)
-        ):
-            if ship.is_owner:
-                self._player_pos_x = ship.x
-                self._player_pos_y = ship.y
-                self._player_is_alive = ship.is_alive
+        ships = sorted(ship_state.values(), key=lambda s: (s.is_alive, s.is_visible))
 
-            yield self._generate_ship(ship)
+        for ship, in_range in zip(ships, self._observer.in_range(ships, self._weather)):
+            yield from self._generate_ship(ship, *self._get_visibility(ship, in_range))
         return
 
-    @memoize
-    def _generate_ship(self, ship: Ship) -> Union[tuple, None]:
+    def _get_visibility(self, ship: Ship, in_range: bool) -> tuple[bool, int]:
+        """
+        Whether the ship is in range and its health, merged with the other side in dual renders.
+        :param ship:
+        :param in_range: Ship is in the owner's range.
+        :return:
+        """
+        health = ship.health
+
+        if self._dual:
+            player = self._replay_data.players[ship.avatar_id]
+
+            if ds := self._share.get(self._clock, player.account_id):
+                in_range = ds.in_range or in_range
+                health = ds.health if ds.health else health
+        return in_range, health
+
+    @memoize(key=lambda self, ship, in_range, health: (hash(ship), in_range, health))
+    def _generate_ship(self, ship: Ship, in_range: bool, health: int) -> list[tuple]:
         """
-        Generates ship icon with names and health bar.
+        Generates the paste arguments of the ship icon, its name holder and health bar. They
+        are pasted one after another instead of being composed on a copy of the holder.
         :param ship:
+        :param in_range: Ship is in range.
+        :param health: Ship health.
         :return:
         """
         info = self._info_ships[ship.vehicle_id]
@@ -351,108 +573,54 @@ class RendererBase:
         x, y = self._get_scaled_xy(ship.x, -ship.y)
         yaw = -ship.yaw
 
-        # view range and weather shenanigans
-
-        dist = (
-            math.hypot(ship.x - self._player_pos_x, ship.y - self._player_pos_y) * 0.03
-        )
-        dist_plane = (
-            math.hypot(
-                ship.x - self._player_plane_pos_x, ship.y - self._player_plane_pos_y
-            )
-            * 0.03
-        )
-
-        if self._weather.vision_distance_ship:
-            sw_vision_km = self._weather.vision_distance_ship * 0.03
-            ship_view_range = (
-                self._player_view_range
-                if sw_vision_km > self._player_view_range
-                else sw_vision_km
-            )
-        else:
-            ship_view_range = self._player_view_range
-
-        if self._weather.vision_distance_plane:
-            pw_vision_km = self._weather.vision_distance_plane * 0.03
-            plane_view_range = 15 if pw_vision_km > 15 else pw_vision_km
-        else:
-            plane_view_range = 15
-
-        in_range_plane = dist_plane <= plane_view_range
-        in_range_ship = dist <= ship_view_range
-        in_range = in_range_ship or in_range_plane
-        in_range = in_range or not self._player_is_alive
-        ###
-        if self._dual:
-            player = self._replay_data.players[ship.avatar_id]
-            if in_range:
-                ds = DataShare()
-                ds.in_range = in_range
-                ds.health = ship.health
-                self._share[player.account_id] = ds
-
-            try:
-                ds = self._share[player.account_id]
-                in_range = ds.in_range or in_range
-                ship.health = ds.health if ds.health else ship.health
-            except KeyError:
-                pass
-
         if self._dual and ship.relation == 1:
-            return None
+            return []
 
         icon = self._get_ship_icon(
             ship.is_alive, ship.is_visible, species, ship.relation, in_range
         ).rotate(yaw, Image.BICUBIC, True)
 
-        if ship.is_alive:
-            icon_holder = paste_centered(info.holder.copy(), icon)
-
-            if ship.is_visible:
-                if in_range:
-                    self._draw_health_bar(
-                        icon_holder, ship.health, ship.health_max, ship.relation
-                    )
-                    return paste_args_centered(icon_holder, x, y, True)
-            return paste_args_centered(icon_holder, x, y, True)
-        else:
-            return paste_args_centered(icon, x, y, True)
+        if not ship.is_alive:
+            return [paste_args_centered(icon, x, y, True)]
+
+        holder = info.holder
+        holder_args = paste_args_centered(holder, x, y, True)
+        hx, hy = holder_args[1]
+        # Where paste_centered put the icon on the holder.
+        ix = hx + round(holder.width / 2 - icon.width / 2)
+        iy = hy + round(holder.height / 2 - icon.height / 2)
+        sprites = [holder_args, (icon, (ix, iy), icon)]
+
+        if ship.is_visible and in_range:
+            health = health if health > 0 else ship.health_max
+            bar = self._get_health_bar(
+                int(50 * health / ship.health_max), ship.relation
+            )
+            bx = hx + round(holder.width / 2 - 25)
+            sprites.append((bar, (bx, hy + 65), bar))
+        return sprites
 
-    def _draw_health_bar(
-        self, image: Image.Image, health: int, health_max: int, relation: int
-    ):
+    @memoize(key=lambda self, *args: args, shared=True)
+    def _get_health_bar(self, width: int, relation: int) -> Image.Image:
         """
-        Health bar stuff.
-        :param image: Image where to draw the health bar.
-        :param health: Ship health.
-        :param health_max: Ship max health.
+        Health bar, from the table of the 51 possible fill widths per relation.
+        :param width: Filled width in pixels, 0 - 50.
         :param relation: Ship relation.
+        :return:
         """
         if self._dual and self._as_enemy:
             color = self._colors[1]
         else:
             relation = 0 if relation == -1 else relation
             color = self._colors[relation]
-        draw = ImageDraw.Draw(image)
-        health_bar_width = 50
-        health_bar_y_pos = 65
-        health_bar_height = 4
-        w, h = image.size
-        x0 = w / 2 - health_bar_width / 2
-        x1 = w - (w / 2 - x0) - x0
-        health = health if health > 0 else health_max
-        x1 = x1 * (health / health_max) + x0
-        draw.rectangle(
-            [(x0, health_bar_y_pos), (w - x0, health_bar_y_pos + health_bar_height)],
-            outline="#808080",
-        )
-        draw.rectangle(
-            [(x0, health_bar_y_pos), (x1, health_bar_y_pos + health_bar_height)],
-            fill=color,
-        )
 
-    @memoize_image_gen
+        bar = Image.new("RGBA", (51, 5))
+        draw = ImageDraw.Draw(bar)
+        draw.rectangle([(0, 0), (50, 4)], outline="#808080")
+        draw.rectangle([(0, 0), (width, 4)], fill=color)
+        return bar
+
+    @memoize(key=lambda self, *args: args, shared=True)
     def _get_ship_icon(
         self,
         is_alive: bool,
@@ -503,7 +671,7 @@ class RendererBase:
             yield self._generate_cap(cap)
         return
 
-    @memoize
+    @memoize(key=lambda self, cap: hash(cap))
     def _generate_cap(self, cap: Capture) -> Union[tuple, None]:
         """
         This generates the capture area depending on the battle type.
@@ -590,7 +758,7 @@ class RendererBase:
         """
         return load_image(self, (self._shared_res_package, "cap_normal.png"), True)
 
-    @memoize_image_gen
+    @memoize(key=lambda self, *args: args, shared=True)
     def _get_progress(self, from_color: str, to_color: str, percent: float):
         """
         Generates the diamond progress icon and colors it depending on the percentage value.
@@ -643,10 +811,6 @@ class RendererBase:
 
             x, y = self._get_scaled_xy(plane.x, -plane.y)
 
-            if plane.relation == -1 and plane.purpose == 0:
-                self._player_plane_pos_x = plane.x
-                self._player_plane_pos_y = plane.y
-
             if plane.relation == 1 and self._dual:
                 yield None
             else:
@@ -656,7 +820,7 @@ class RendererBase:
                 yield paste_args_centered(icon, x, y, True)
         return
 
-    @memoize_image_gen
+    @memoize(key=lambda self, *args: args, shared=True)
     def _get_plane_icon(self, plane_params_id: int, purpose: int, relation: int):
         """
         Gets the plane icon from disk/memory.
@@ -713,7 +877,7 @@ class RendererBase:
                 yield self._generate_ward(ward)
         return
 
-    @memoize
+    @memoize(key=lambda self, ward: hash(ward))
     def _generate_ward(self, ward: Ward) -> tuple:
         """
         Gets the ward image from disk or memory.
@@ -756,7 +920,7 @@ class RendererBase:
         generated = self._generate_score(score_state)
         return paste_args(generated, 50, 12, False)
 
-    @memoize
+    @memoize(key=lambda self, score_state: hash(score_state))
     def _generate_score(self, score_state: Score):
         """
         Generates scores.
@@ -767,10 +931,10 @@ class RendererBase:
         spacer = 50
         bar_height = 30
         mid = round(image.width / 2)
-        ally_score_text_w, ally_score_text_h = self._font_score.getsize(
-            f"{score_state.ally_score}"
+        ally_score_text_w, ally_score_text_h = text_size(
+            self._font_score, f"{score_state.ally_score}"
         )
-        separator_w, separator_h = self._font_score.getsize(":")
+        separator_w, separator_h = text_size(self._font_score, ":")
         draw = ImageDraw.Draw(image)
         draw.rectangle([(0, 0), (mid - spacer, bar_height)], outline="#4ce8aa", width=1)
         draw.rectangle(
@@ -783,19 +947,14 @@ class RendererBase:
         b = b + mid + spacer
         draw.rectangle([(0, 0), (a, bar_height)], fill="#4ce8aa")
         draw.rectangle([(mid + spacer, 0), (b, bar_height)], fill="#fe4d2a")
-        draw.text(
+        draw_text(
+            image,
             (mid - ally_score_text_w - 8, -1),
-            text=str(score_state.ally_score),
-            font=self._font_score,
-            fill="white",
+            str(score_state.ally_score),
+            self._font_score,
         )
-        draw.text(
-            (mid + 8, -1),
-            text=str(score_state.enemy_score),
-            font=self._font_score,
-            fill="white",
-        )
-        draw.text((mid - round(separator_w / 2), -1), text=":", font=self._font_score)
+        draw_text(image, (mid + 8, -1), str(score_state.enemy_score), self._font_score)
+        draw_text(image, (mid - round(separator_w / 2), -1), ":", self._font_score)
         return image
 
     @catch_exception_non_generator
@@ -808,7 +967,12 @@ class RendererBase:
         generated = self._generate_score_timer(score_state, cap_state)
         return paste_args(generated, 800 - generated.width - 5, 5, False)
 
-    @memoize_image_gen
+    @memoize(
+        key=lambda self, score_state, cap_state: (
+            hash(score_state),
+            *map(hash, cap_state),
+        )
+    )
     def _generate_score_timer(self, score_state: Score, cap_state: list[Capture]):
         """
         Generates scores.
@@ -858,19 +1022,19 @@ class RendererBase:
         w, h = 41, 42
 
         bg_image: Image.Image = Image.new("RGBA", (w, h), self._global_bg_color)
-        bg_image_draw = ImageDraw.Draw(bg_image)
-
-        bg_image_draw.text(
+        draw_text(
+            bg_image,
             (0, 0),
-            text=f"{getattr(self, 'ally_cap_time', '99:99')}",
-            fill=self._colors[0],
-            font=self._font_time,
+            f"{getattr(self, 'ally_cap_time', '99:99')}",
+            self._font_time,
+            self._colors[0],
         )
-        bg_image_draw.text(
+        draw_text(
+            bg_image,
             (0, 18),
-            text=f"{getattr(self, 'enemy_cap_time', '99:99')}",
-            fill=self._colors[1],
-            font=self._font_time,
+            f"{getattr(self, 'enemy_cap_time', '99:99')}",
+            self._font_time,
+            self._colors[1],
         )
 
         return bg_image
@@ -890,7 +1054,7 @@ class RendererBase:
         else:
             return
 
-    @memoize_image_gen
+    @memoize(key=lambda self, weather_state: hash(weather_state))
     def _generate_weather_info(self, weather_state: Weather):
         cyclone_icon: Image.Image = load_image(
             self, (self._shared_res_package, "cyclone.png"), True
@@ -902,13 +1066,13 @@ class RendererBase:
             (0, int(bg.height / 2 - cyclone_icon.height / 2)),
             cyclone_icon,
         )
-        bg_draw = ImageDraw.Draw(bg)
         dist_text = f"{round(weather_state.vision_distance_ship * 0.03) :02}"
-        tw, th = self._font_weather.getsize(dist_text)
-        bg_draw.text(
+        tw, th = text_size(self._font_weather, dist_text)
+        draw_text(
+            bg,
             (cyclone_icon.width + 3, int(bg.height / 2 - th / 2) - 3),
-            text=dist_text,
-            font=self._font_weather,
+            dist_text,
+            self._font_weather,
         )
         return bg
 
@@ -920,7 +1084,7 @@ class RendererBase:
     def _layer_damage(self, damage: int, agro: int, spot: int) -> tuple:
         return self._generate_damage(damage, agro, spot)
 
-    @memoize
+    @memoize(key=lambda self, *args: args)
     def _generate_damage(self, damage: int, agro: int, spot: int):
         """
         Creates the damage counter image. Pretty straightforward.
@@ -936,19 +1100,18 @@ class RendererBase:
         text_spot_val = f"{spot:,}".replace(",", " ")
 
         base: Image.Image = Image.new("RGBA", (490, 110), self._global_bg_color)
-        base_draw = ImageDraw.Draw(base)
 
         y_pos = -5
         for text in [text_damage, text_agro, text_spot]:
-            w, h = self._font_damage.getsize(text)
-            base_draw.text((0, y_pos), text=text, font=self._font_damage)
+            w, h = text_size(self._font_damage, text)
+            draw_text(base, (0, y_pos), text, self._font_damage)
             y_pos += h - 5
 
         y_pos = -5
         for text in [text_damage_val, text_agro_val, text_spot_val]:
-            w, h = self._font_damage.getsize(text)
+            w, h = text_size(self._font_damage, text)
             x = base.width - w - 10
-            base_draw.text((x, y_pos), text=text, font=self._font_damage)
+            draw_text(base, (x, y_pos), text, self._font_damage)
             y_pos += h - 5
         return paste_args(base, 810, 5)
 
@@ -964,7 +1127,7 @@ class RendererBase:
         self._logs_y = generated.height + 110
         return paste_args(generated, 810, 110, False)
 
-    @memoize_image_gen
+    @memoize(key=lambda self, ribbons: hash(ribbons))
     def _generate_ribbons(self, ribbons):
         """
         This yields a tuple for the paste function.
@@ -991,7 +1154,7 @@ class RendererBase:
                 cx = 0
         return base
 
-    @memoize_image_gen
+    @memoize(key=lambda self, *args: args, shared=True)
     def _get_ribbon_image(self, ribbon_name, count: int):
         """
         This loads (from disk or memory) the requested ribbon icon.
@@ -1002,12 +1165,12 @@ class RendererBase:
         resource = f"{self._res_package}.ribbons"
         ribbon_img = load_image(self, (resource, f"{ribbon_name}.png"), True)
         text = f"x{count}"
-        tw, th = self._font_score.getsize(text)
-        draw = ImageDraw.Draw(ribbon_img)
-        draw.text(
+        tw, th = text_size(self._font_score, text)
+        draw_text(
+            ribbon_img,
             (ribbon_img.width - tw - 4, ribbon_img.height - th - 3),
             text,
-            font=self._font_score,
+            self._font_score,
             stroke_width=1,
             stroke_fill="black",
         )
@@ -1027,7 +1190,7 @@ class RendererBase:
         )
         return generated
 
-    @memoize_image_gen
+    @memoize(key=lambda self, achievement: tuple(map(hash, achievement)))
     def _generate_achievement(self, achievement: list[Achievement]):
         cx = 0
         cy = 0
@@ -1049,7 +1212,7 @@ class RendererBase:
                 cx = 810
         return base
 
-    @memoize_image_gen
+    @memoize(key=lambda self, *args: args, shared=True)
     def _get_achievement_image(self, a_id: int, count: int):
         """
         This loads (from disk or memory) the requested achievement icon.
@@ -1066,15 +1229,14 @@ class RendererBase:
         # Don't display x{Count} if there's only 1 achievement of that type earned.
         if count > 1:
             text = f"x{count}"
-            tw, th = self._font_score.getsize(text)
-            draw = ImageDraw.Draw(achievement_image)
-            draw.text(
+            tw, th = text_size(self._font_score, text)
+            draw_text(
+                achievement_image,
                 (achievement_image.width - tw - 5, achievement_image.height - th - 3),
                 text,
-                font=self._font_score,
+                self._font_score,
                 stroke_width=1,
                 stroke_fill="black",
-                fill="white",
             )
         return achievement_image
 
@@ -1162,7 +1324,9 @@ class RendererBase:
 
         return paste_args(base, 810, 850 - base.height, False)
 
-    @memoize_image_gen
+    @memoize(
+        key=lambda self, *args: tuple(arg for arg in args if isinstance(arg[0], str))
+    )
     def _get_line(
         self,
         killer_name,
@@ -1182,8 +1346,12 @@ class RendererBase:
         line_height = 21
         spacer = 4
 
-        killer_ship_name_w, killer_ship_name_h = self._font.getsize(killer_ship_name[0])
-        killed_ship_name_w, killed_ship_name_h = self._font.getsize(killed_ship_name[0])
+        killer_ship_name_w, killer_ship_name_h = text_size(
+            self._font, killer_ship_name[0]
+        )
+        killed_ship_name_w, killed_ship_name_h = text_size(
+            self._font, killed_ship_name[0]
+        )
 
         total_w_static = (
             killer_icon[0].width
@@ -1208,7 +1376,6 @@ class RendererBase:
         base: Image.Image = Image.new(
             "RGBA", (total_width, line_height), self._global_bg_color
         )
-        base_draw = ImageDraw.Draw(base)
         pos_x = 0
 
         for n in [
@@ -1222,8 +1389,8 @@ class RendererBase:
         ]:
             if isinstance(n, tuple) and all(isinstance(i, str) for i in n):
                 text, color = n
-                _w, _ = self._font.getsize(text)
-                base_draw.text((pos_x, 0), text=text, font=self._font, fill=color)
+                _w, _ = text_size(self._font, text)
+                draw_text(base, (pos_x, 0), text, self._font, color)
                 pos_x += _w + spacer
             elif isinstance(n, tuple) and all(
                 isinstance(i, Image.Image) or isinstance(i, int) for i in n
@@ -1234,7 +1401,7 @@ class RendererBase:
 
         return base
 
-    @memoize_image_gen
+    @memoize(key=lambda self, *args: args, shared=True)
     def _get_ship_frag_log_icon(self, species: str, relation: int, killer: bool):
         """
         Gets the requested killer and killed ship icon and rotate it properly.
@@ -1258,7 +1425,7 @@ class RendererBase:
         else:
             return image.rotate(90, resample=Image.BICUBIC, expand=True)
 
-    @memoize_image_gen
+    @memoize(key=lambda self, death_type: death_type, shared=True)
     def _get_death_type_icon(self, death_type: int) -> Image.Image:
         res_death_type_icons = f"{self._res_package}.frag_icons"
         attr_name = self._death_types[death_type]["icon"]
@@ -1278,43 +1445,91 @@ class RendererBase:
         Get the map info.
         Set the scaling factor for coordinates and radius.
         """
+        (
+            self._img_minimap,
+            self._img_info_panel,
+            self._global_bg_color,
+            self._scaling_x,
+            self._scaling_y,
+        ) = self._get_map(self._replay_data.match.map_name, self._logs)
+
+    @memoize(key=lambda self, *args: args, shared=True)
+    def _get_map(self, map_name: str, logs: bool) -> tuple:
+        """
+        Loads the minimap and the info panel background from the bake, building and baking them
+        on the first use.
+        :param map_name: Map name.
+        :param logs: Adds room for the logs on the info panel.
+        :return: minimap, info panel, background color, scaling x and scaling y.
+        """
         try:
-            target_package = (
-                f"{self._res_package}.spaces.{self._replay_data.match.map_name}"
-            )
-            minimap_settings = read_text(target_package, "space.settings")
+            target_package = f"{self._res_package}.spaces.{map_name}"
+            minimap_settings = ASSETS.read_text(target_package, "space.settings")
         except Exception:
-            target_package = (
-                f"{self._res_package}.spaces.s{self._replay_data.match.map_name}"
-            )
-            minimap_settings = read_text(target_package, "space.settings")
+            target_package = f"{self._res_package}.spaces.s{map_name}"
+            minimap_settings = ASSETS.read_text(target_package, "space.settings")
 
+        # The enemy side's base is blank, not worth a bake.
+        if self._dual and self._as_enemy:
+            return self._build_map(target_package, minimap_settings, logs)
+
+        blobs = [
+            ASSETS.blob(target_package, name)
+            for name in ("space.settings", "minimap.png", "minimap_water.png")
+        ]
+
+        # Resources read without a manifest can't tell when they change, they aren't baked.
+        if None in blobs:
+            return self._build_map(target_package, minimap_settings, logs)
+
+        legends = ASSETS.digest(self._shared_res_package, "minimap_grid_legends.png")
+        key = BAKE_VERSION, *blobs, legends, logs
+
+        if baked := MAP_BAKE.load(key):
+            return baked
+
+        MAP_BAKE.cleanup()
+        result = self._build_map(target_package, minimap_settings, logs)
+        MAP_BAKE.save(key, *result)
+        return result
+
+    def _build_map(
+        self, target_package: str, minimap_settings: str, logs: bool
+    ) -> tuple:
+        """
+        Builds the minimap and the info panel background.
+        :param target_package: Resource package of the map.
+        :param minimap_settings: Space settings of the map.
+        :param logs: Adds room for the logs on the info panel.
+        :return: minimap, info panel, background color, scaling x and scaling y.
+        """
         minimap_settings = etree.fromstring(minimap_settings)
 
         if self._dual and self._as_enemy:
             map_w, map_h = get_map_size(minimap_settings)
 
-            with open_binary(target_package, "minimap.png") as _map:
+            with ASSETS.open_binary(target_package, "minimap.png") as _map:
                 island: Image.Image = Image.open(_map)
 
             base: Image.Image = Image.new("RGBA", (800, 800), "#00000000")
-            self._scaling_x = island.width / map_w
-            self._scaling_y = island.height / map_h
-            self._img_minimap = base
-            self._img_info_panel = base.copy().resize(
-                (800, 850), resample=Image.NEAREST
+            info_panel = base.copy().resize((800, 850), resample=Image.NEAREST)
+            return (
+                base,
+                info_panel,
+                (0, 0, 0, 0),
+                island.width / map_w,
+                island.height / map_h,
             )
-            return
 
         b_islands, b_water, b_legends = map(
-            open_binary,
+            ASSETS.open_binary,
             (target_package, target_package, self._shared_res_package),
             ("minimap.png", "minimap_water.png", "minimap_grid_legends.png"),
         )
 
         water, island, legend = map(Image.open, [b_water, b_islands, b_legends])
         info_panel = water.copy()
-        self._global_bg_color = info_panel.getpixel((10, 10))
+        bg_color = info_panel.getpixel((10, 10))
         water = water.resize(legend.size, resample=Image.LANCZOS)
         water: Image.Image = Image.alpha_composite(water, legend)
         offset = water.width - island.width, water.height - island.height
@@ -1325,47 +1540,52 @@ class RendererBase:
         info_panel = info_panel.resize(
             (water.width, water.height + 50), resample=Image.NEAREST
         )
-        self._img_info_panel = info_panel
 
-        if self._logs:
+        if logs:
             new_base = Image.new(
                 "RGBA",
                 (info_panel.width + 500, info_panel.height),
-                self._global_bg_color,
+                bg_color,
             )
             new_base.paste(info_panel)
-            self._img_info_panel = new_base
+            info_panel = new_base
 
         map_w, map_h = get_map_size(minimap_settings)
-        self._scaling_x = island.width / map_w
-        self._scaling_y = island.height / map_h
-        self._img_minimap = water
+        return (
+            water,
+            info_panel,
+            bg_color,
+            island.width / map_w,
+            island.height / map_h,
+        )
 
     def _load_fonts(self):
         """
         Loads the required fonts.
         """
         self._font = ImageFont.truetype(
-            open_binary(self._shared_res_package, "warhelios_bold.ttf"), size=12
+            ASSETS.open_binary(self._shared_res_package, "warhelios_bold.ttf"), size=12
         )
         self._font_damage = ImageFont.truetype(
-            open_binary(self._shared_res_package, "warhelios_bold.ttf"), size=32
+            ASSETS.open_binary(self._shared_res_package, "warhelios_bold.ttf"), size=32
         )
         self._font_time = ImageFont.truetype(
-            open_binary(self._shared_res_package, "warhelios_bold.ttf"), size=18
+            ASSETS.open_binary(self._shared_res_package, "warhelios_bold.ttf"), size=18
         )
         self._font_weather = ImageFont.truetype(
-            open_binary(self._shared_res_package, "warhelios_bold.ttf"), size=18
+            ASSETS.open_binary(self._shared_res_package, "warhelios_bold.ttf"), size=18
         )
         self._font_score = ImageFont.truetype(
-            open_binary(self._shared_res_package, "warhelios_bold.ttf"), size=23
+            ASSETS.open_binary(self._shared_res_package, "warhelios_bold.ttf"), size=23
         )
 
     def _get_used_ships(self):
         """
         Pre generates icon holders and gets the ship info.
         """
-        si: dict[str, dict] = json.load(open_text(self._res_package, "info_ship.json"))
+        si: dict[str, dict] = json.load(
+            ASSETS.open_text(self._res_package, "info_ship.json")
+        )
 
         for player in self._replay_data.players.values():
             ship = si[str(player.ship_params_id)]
@@ -1381,27 +1601,33 @@ class RendererBase:
             else:
                 color = self._colors[player.relation]
 
-            holder = generate_holder(ship["name"], font=self._font, font_color=color)
+            holder = self._get_holder(ship["name"], color)
             self._info_ships[player.vehicle_id] = self._nt_ship_info(
                 name, species, level, visibility_coef, holder
             )
 
+    @memoize(key=lambda self, *args: args, shared=True)
+    def _get_holder(self, name: str, color: str) -> Image.Image:
+        """
+        Generates the ship name holder.
+        :param name: Ship name.
+        :param color: Font color.
+        :return: PIL Image.
+        """
+        return generate_holder(name, font=self._font, font_color=color)
+
     def _get_used_planes(self):
         """
-        Gets all the used plane in the replay.
+        Gets the info of every plane, the states may not be all parsed yet.
         """
         pi: dict[str, dict] = json.load(
-            open_text(self._res_package, "info_planes.json")
+            ASSETS.open_text(self._res_package, "info_planes.json")
         )
 
-        for states in self._replay_data.states.values():
-            for plane in states.planes.values():
-                info_id = str(plane.plane_params_id)
-                if info_id not in self._info_planes:
-                    info = pi[info_id]
-                    self._info_planes[plane.plane_params_id] = self._nt_plane_info(
-                        info["species"], info["ammo_type"]
-                    )
+        for info_id, info in pi.items():
+            self._info_planes[int(info_id)] = self._nt_plane_info(
+                info["species"], info["ammo_type"]
+            )
 
     def _get_player_initial_state(self):
         """
@@ -1411,9 +1637,9 @@ class RendererBase:
 
         for vehicle in states.ships.values():
             if vehicle.vehicle_id == self._replay_data.match.owner_vehicle_id:
-                self._player_pos_x = vehicle.x
-                self._player_pos_y = vehicle.y
-                self._player_view_range = self._info_ships[
+                self._observer.x = vehicle.x
+                self._observer.y = vehicle.y
+                self._observer.view_range = self._info_ships[
                     vehicle.vehicle_id
                 ].visibility_coef
                 break
@@ -1434,56 +1660,64 @@ class RendererBase:
         self._death_types: dict[str, dict] = {
             int(k): v
             for k, v in json.load(
-                open_text(self._res_package, "info_death.json")
+                ASSETS.open_text(self._res_package, "info_death.json")
             ).items()
         }
 
-    def _get_writer(self):
+    def _get_writer(self, output_path: str) -> FFmpegWriter:
         """
         Return an ffmpeg writer.
+        :param output_path: Video destination.
         :return:
         """
+        profile = EncoderProfile(
+            **{**self._encoder.to_dict(), "preset": self._plan.preset}
+        )
+        return FFmpegWriter(
+            path=output_path,
+            size=self._img_info_panel.size,
+            fps=self._fps / self._plan.stride,
+            profile=profile,
+            audio=self._get_audio_plan(),
+            hold_end=self._hold_end,
+            scale=self._plan.scale,
+        )
 
+    def _get_audio_plan(self) -> Union[AudioPlan, None]:
+        """
+        Audio for benny/doom modes, muxed by the same ffmpeg process that encodes the frames.
+        :return:
+        """
         if self._benny:
             with path(self._shared_res_package, "bgm.mp3") as bgm_path:
-                return write_frames(
-                    path=self._temp_output_path,
-                    fps=self._fps,
-                    macro_block_size=self._get_macro_block(),
-                    quality=self._quality,
-                    size=self._img_info_panel.size,
-                    pix_fmt_in="rgba",
-                    audio_path=str(bgm_path.absolute()),
-                    output_params=["-shortest"],
-                )
-        else:
-            return write_frames(
-                path=self._temp_output_path,
-                fps=self._fps,
-                macro_block_size=self._get_macro_block(),
-                quality=self._quality,
-                size=self._img_info_panel.size,
-                pix_fmt_in="rgba",
-            )
+                return plan_benny(str(bgm_path.absolute()))
+
+        if self._doom and self._replay_data.owner_frag_times:
+            frag = self._replay_data.owner_frag_times[0]
 
-    def _get_macro_block(self) -> int:
+            with path(self._shared_res_package, "doom.mp3") as doom_path:
+                doom_bgm = str(doom_path.absolute())
+
+            with path(self._shared_res_package, "elevator.mp3") as elevator_path:
+                elevator_bgm = str(elevator_path.absolute())
+
+            return plan_doom(doom_bgm, elevator_bgm, self._get_video_time(frag))
+        return None
+
+    def _get_video_time(self, battle_time: float) -> float:
         """
-        Get the proper macro block for the imageio.get_writer
-        :return:
+        Where a moment of the battle is in the video.
+        :param battle_time: Seconds since the battle started.
+        :return: Seconds, the end of the video when it is past the rendered states.
         """
+        clock = list(self._replay_data.states)
+        position = len(self._selection)
 
-        def _get_macro_block(frame_size) -> set:
-            max_macro_block = 200
-            default_macro_block = 16
-            nums = set()
-            for i in range(1, max_macro_block + 1):
-                rem = frame_size % i
-                if rem == 0 and i >= default_macro_block:
-                    nums.add(i)
-            return nums
-
-        a, b = map(_get_macro_block, self._img_info_panel.size)
-        return min(a.intersection(b))
+        for pos, idx in enumerate(self._selection):
+            if clock[0] - clock[idx] >= battle_time:
+                position = pos
+                break
+        return position / self._fps
 
     ###########
     # HELPERS #
@@ -1507,12 +1741,3 @@ class RendererBase:
         :return:
         """
         return radius * (self._scaling_x + self._scaling_y) / 2
-
-    def _delete_expired(self):
-        for idx in set(self._cache.keys()):
-            try:
-                _, it = self._cache[idx]
-                if self._iterations - it >= self._cache_max_it:
-                    del self._cache[idx]
-            except ValueError:
-                pass
@@ -0,0 +1,104 @@
+from typing import Union
+
+from renderer.writer import PRESETS
+
+# Rough costs in seconds, measured on an 800x850 frame. predicted vs actual is kept in the job meta
+# ("budget") to re-tune them.
+COST_SETUP = 1.5
+COST_FRAME = 0.008
+COST_ENTITY = 0.0006
+COST_LOGS = 0.003
+# x264 medium, per megapixel. Other presets scale it by PRESET_FACTORS.
+COST_ENCODE = 0.009
+PRESET_FACTORS = dict(zip(PRESETS, (0.25, 0.35, 0.5, 0.7, 0.85, 1.0, 1.6, 2.8, 5.0)))
+
+# Degradation steps, least visible first. A step is skipped if it would not lower the cost.
+LADDER = (
+    ("preset", "faster"),
+    ("preset", "veryfast"),
+    ("stride", 2),
+    ("scale", 0.75),
+    ("stride", 3),
+    ("preset", "ultrafast"),
+    ("scale", 0.5),
+    ("stride", 4),
+)
+
+
+class RenderPlan:
+    __slots__ = ["stride", "scale", "preset", "predicted"]
+
+    def __init__(self, stride=1, scale=1.0, preset="medium", predicted=0.0):
+        self.stride: int = stride
+        self.scale: float = scale
+        self.preset: str = preset
+        self.predicted: float = predicted
+
+    def to_dict(self) -> dict:
+        return {attr: getattr(self, attr) for attr in self.__slots__}
+
+
+def estimate(
+    total: int,
+    entities: float,
+    size: tuple[int, int],
+    logs: bool,
+    stride: int = 1,
+    scale: float = 1.0,
+    preset: str = "medium",
+) -> float:
+    """
+    Predicted render time.
+    :param total: Number of states.
+    :param entities: Average number of ships, planes, wards and captures per state.
+    :param size: Frame size.
+    :param logs: Logs are drawn.
+    :param stride: Every stride-th state is rendered.
+    :param scale: Output scale.
+    :param preset: Encoder preset.
+    :return: Seconds.
+    """
+    frames = -(-total // stride)
+    megapixels = size[0] * size[1] * scale**2 / 1_000_000
+    compose = COST_FRAME + COST_ENTITY * entities + (COST_LOGS if logs else 0)
+    encode = COST_ENCODE * megapixels * PRESET_FACTORS[preset]
+    return COST_SETUP + frames * (compose + encode)
+
+
+def plan_render(
+    total: int,
+    entities: float,
+    size: tuple[int, int],
+    logs: bool,
+    preset: str,
+    budget: Union[float, None] = None,
+) -> RenderPlan:
+    """
+    Degrades the render along LADDER until it is predicted to fit the budget. When it never
+    does, the most degraded plan is returned.
+    :param total: Number of states.
+    :param entities: Average number of ships, planes, wards and captures per state.
+    :param size: Frame size.
+    :param logs: Logs are drawn.
+    :param preset: Configured encoder preset.
+    :param budget: Seconds available for the render. None renders at full quality.
+    :return: RenderPlan
+    """
+    plan = RenderPlan(preset=preset)
+    plan.predicted = estimate(total, entities, size, logs, preset=preset)
+
+    if budget is None:
+        return plan
+
+    for attr, value in LADDER:
+        if plan.predicted <= budget:
+            break
+
+        params = {a: getattr(plan, a) for a in ("stride", "scale", "preset")}
+        params[attr] = value
+        predicted = estimate(total, entities, size, logs, **params)
+
+        if predicted < plan.predicted:
+            setattr(plan, attr, value)
+            plan.predicted = predicted
+    return plan
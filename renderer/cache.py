@@ -0,0 +1,159 @@
+import sys
+from collections import OrderedDict
+from typing import Any, Hashable, Union
+
+from PIL import Image
+
+MISSING = object()
+
+
+def sizeof(value: Any) -> int:
+    """
+    Rough size of a cached value in bytes. Images are counted by their pixel data,
+    tuples/lists (paste arguments) by their images, counting an image only once.
+    :param value: Cached value.
+    :return: Size in bytes.
+    """
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+
+    if isinstance(value, (tuple, list)):
+        seen = set()
+        total = sys.getsizeof(value)
+        for item in value:
+            if id(item) in seen:
+                continue
+            seen.add(id(item))
+            total += sizeof(item)
+        return total
+    return sys.getsizeof(value)
+
+
+class CacheStats:
+    __slots__ = ["hits", "misses", "evictions"]
+
+    def __init__(self):
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def to_dict(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class SpriteCache:
+    """
+    LRU cache for generated sprites with byte-size accounting.
+    Entries are keyed by (function name, key) and the least recently used entries are evicted
+    once the total size goes over max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, tuple[Any, int]] = OrderedDict()
+        self._bytes = 0
+        self._stats: dict[str, CacheStats] = {}
+
+    def get(self, name: str, key: Hashable) -> Any:
+        """
+        Gets a cached value and marks it as recently used.
+        :param name: Function name.
+        :param key: Cache key.
+        :return: The cached value or MISSING.
+        """
+        stats = self._get_stats(name)
+
+        try:
+            value, _ = self._entries[(name, key)]
+        except KeyError:
+            stats.misses += 1
+            return MISSING
+
+        self._entries.move_to_end((name, key))
+        stats.hits += 1
+        return value
+
+    def put(self, name: str, key: Hashable, value: Any):
+        """
+        Stores a value then evicts the least recently used entries if the cache is full.
+        :param name: Function name.
+        :param key: Cache key.
+        :param value: Value to cache.
+        """
+        size = sizeof(value)
+
+        if size > self._max_bytes:
+            return
+
+        if old := self._entries.pop((name, key), None):
+            self._bytes -= old[1]
+
+        self._entries[(name, key)] = value, size
+        self._bytes += size
+        self._evict()
+
+    def _evict(self):
+        while self._bytes > self._max_bytes:
+            (evicted_name, _), (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._get_stats(evicted_name).evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def resize(self, max_bytes: int):
+        """
+        Changes the memory cap, evicting entries if needed.
+        :param max_bytes: New cap in bytes.
+        """
+        self._max_bytes = max_bytes
+        self._evict()
+
+    def stats(self, since: Union[dict, None] = None) -> dict:
+        """
+        Hit/miss/eviction counters per function name.
+        :param since: Earlier stats(), only what was counted after it is returned.
+        :return:
+        """
+        stats = {name: stats.to_dict() for name, stats in self._stats.items()}
+
+        if since is None:
+            return stats
+
+        diff = {}
+
+        for name, counters in stats.items():
+            before = since.get(name, {})
+            counters = {k: v - before.get(k, 0) for k, v in counters.items()}
+
+            if any(counters.values()):
+                diff[name] = counters
+        return diff
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get_stats(self, name: str) -> CacheStats:
+        try:
+            return self._stats[name]
+        except KeyError:
+            stats = self._stats[name] = CacheStats()
+            return stats
+
+
+# Process-level cache for sprites that only depend on game resources and their parameters.
+# It outlives the renderer instances, so a warm (non-forking) worker keeps it across jobs.
+SHARED_CACHE = SpriteCache(max_bytes=256 * 1024 * 1024)
+
+
+def configure_shared_cache(max_bytes: int):
+    """
+    Sets the memory cap of the process-level sprite cache.
+    :param max_bytes: Cap in bytes.
+    """
+    SHARED_CACHE.resize(max_bytes)
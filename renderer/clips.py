@@ -0,0 +1,57 @@
+from typing import Union
+
+from renderer.data import States
+
+# Seconds rendered around a focused event.
+FOCUS_BEFORE = 10
+FOCUS_AFTER = 5
+
+
+def select_window(clock: list[int], start: int, end: int) -> list[int]:
+    """
+    States shown between two battle timer values.
+    :param clock: State keys (seconds left in the battle, as drawn on the timer).
+    :param start: Timer value the clip starts at.
+    :param end: Timer value the clip ends at.
+    :return: Indices of the states.
+    """
+    low, high = sorted((start, end))
+    return [idx for idx, left in enumerate(clock) if low <= left <= high]
+
+
+def select_events(
+    clock: list[int],
+    times: list[float],
+    before: float = FOCUS_BEFORE,
+    after: float = FOCUS_AFTER,
+) -> list[int]:
+    """
+    States around events, overlapping ranges are merged.
+    :param clock: State keys (seconds left in the battle).
+    :param times: Event times in seconds since the battle started.
+    :param before: Seconds before each event.
+    :param after: Seconds after each event.
+    :return: Indices of the states.
+    """
+    if not clock:
+        return []
+
+    return [
+        idx
+        for idx, left in enumerate(clock)
+        if any(t - before <= clock[0] - left <= t + after for t in times)
+    ]
+
+
+def get_owner_death_time(clock: list[int], states: list[States]) -> Union[int, None]:
+    """
+    When the owner's ship was sunk.
+    :param clock: State keys (seconds left in the battle).
+    :param states: States, in the same order.
+    :return: Seconds since the battle started, None if the owner survived.
+    """
+    for left, state in zip(clock, states):
+        for ship in state.ships.values():
+            if ship.is_owner and not ship.is_alive:
+                return clock[0] - left
+    return None
@@ -1,9 +1,12 @@
 import os
 from functools import wraps
-from importlib.resources import open_binary
+from typing import Callable
 
 from PIL import Image, ImageDraw, ImageColor, ImageFont
 
+from renderer.assets import ASSETS
+from renderer.cache import MISSING, SHARED_CACHE
+
 
 def delete_temp_files(*files):
     try:
@@ -50,66 +53,56 @@ def catch_exception_non_generator(f):
     return wrapper
 
 
-def memoize(f):
-    @wraps(f)
-    def wrapper(self, *args, **kwargs):
-        to_hash = []
-
-        for arg in args:
-            if isinstance(arg, list):
-                to_hash.extend(i for i in arg)
-            else:
-                to_hash.append(arg)
-
-        obj_hash = hash(tuple(to_hash) + (f.__name__,))
-
-        if obj_hash not in self._cache:
-            result = f(self, *args, **kwargs), self._iterations
-            self._cache[obj_hash] = result
-        else:
-            result = self._cache[obj_hash]
-        return result[0]
-
-    return wrapper
+def memoize(key: Callable, shared=False):
+    """
+    Caches the result of a renderer method in the renderer's sprite cache.
+    :param key: Callable that takes the same arguments as the wrapped method and returns the cache key.
+    :param shared: Use the process-level cache instead. The key is scoped with the renderer's cache scope
+    (game version and render mode), so only use this for results that don't depend on the replay.
+    :return: decorator
+    """
 
+    def decorator(f):
+        name = f.__name__
 
-def memoize_image_gen(f):
-    @wraps(f)
-    def wrapper(self, *args, **kwargs):
-        to_hash = []
-
-        for arg in args:
-            if isinstance(arg, list):
-                to_hash.extend(i for i in arg)
-            elif isinstance(arg, Image.Image):
-                continue
-            elif isinstance(arg, tuple) and any(isinstance(i, Image.Image) for i in arg):
-                continue
+        @wraps(f)
+        def wrapper(self, *args, **kwargs):
+            if shared:
+                cache = SHARED_CACHE
+                cache_key = self._cache_scope, key(self, *args, **kwargs)
             else:
-                to_hash.append(arg)
+                cache = self._cache
+                cache_key = key(self, *args, **kwargs)
 
-        obj_hash = hash(tuple(to_hash) + (f.__name__,))
+            result = cache.get(name, cache_key)
 
-        if obj_hash not in self._cache:
-            result = f(self, *args, **kwargs), self._iterations
-            self._cache[obj_hash] = result
-        else:
-            result = self._cache[obj_hash]
-        return result[0]
+            if result is MISSING:
+                result = f(self, *args, **kwargs)
+                cache.put(name, cache_key, result)
+            return result
 
-    return wrapper
+        return wrapper
+
+    return decorator
 
 
 def load_image(obj: object, resource: tuple[str, str], return_copy=False):
-    index_name = f"image_{hash(resource)}"
+    """
+    Loads an image resource through the process-level cache.
+    :param obj: Object requesting the image. Unused, images are shared.
+    :param resource: Package and resource name.
+    :param return_copy: Return a copy that the caller can modify.
+    :return: RGBA image.
+    """
+    # Keyed by blob, so the versions share the images they have in common.
+    key = ASSETS.blob(*resource) or resource
+    image = SHARED_CACHE.get("load_image", key)
 
-    if im := getattr(obj, index_name, None):
-        image = im
-    else:
-        image: Image.Image = Image.open(open_binary(*resource))
+    if image is MISSING:
+        image: Image.Image = Image.open(ASSETS.open_binary(*resource))
         if image.mode != "RGBA":
             image = image.convert("RGBA")
-        setattr(obj, index_name, image)
+        SHARED_CACHE.put("load_image", key, image)
     if return_copy:
         return image.copy()
     else:
@@ -154,7 +147,7 @@ def draw_circle(size: tuple, fill, outline=None, width=1, aliasing_strength=4):
     return base
 
 
-@memoize_image_gen
+@memoize(key=lambda obj, *args: args, shared=True)
 def generate_torus(obj: object, from_color, to_color, outer_radius: int = 0, inner_radius: int = 0,
                    progress: float = 0.0):
     """
@@ -272,6 +265,23 @@ def paste_args_centered(image: Image.Image, x, y, masked=False) -> tuple:
         return image, ((x - round(image.width / 2)) + o, (y - round(image.height / 2)) + o)
 
 
+def alpha_paste(canvas: Image.Image, image: Image.Image, xy: tuple, bounds: tuple = None):
+    """
+    Alpha composites the image onto the canvas in place, clipped to bounds.
+    :param canvas: RGBA image to draw on.
+    :param image: RGBA image.
+    :param xy: Position of the image's upper left corner on the canvas.
+    :param bounds: (left, upper, right, lower) of the canvas to draw in, the whole canvas if None.
+    """
+    x, y = xy
+    left, upper, right, lower = bounds if bounds else (0, 0, *canvas.size)
+    sx, sy = max(left - x, 0), max(upper - y, 0)
+    ex, ey = min(right - x, image.width), min(lower - y, image.height)
+
+    if sx < ex and sy < ey:
+        canvas.alpha_composite(image, (x + sx, y + sy), (sx, sy, ex, ey))
+
+
 def paste_args(image: Image.Image, x, y, masked=False) -> tuple:
     if masked:
         return image, (x, y), image
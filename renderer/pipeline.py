@@ -0,0 +1,117 @@
+import queue
+import threading
+import time
+from typing import Union
+
+from PIL import Image
+
+from renderer.writer import FFmpegWriter
+
+_END = object()
+
+
+class StageStats:
+    __slots__ = ["items", "busy", "waited"]
+
+    def __init__(self, items=0, busy=0.0, waited=0.0):
+        """
+        :param items: Frames handled.
+        :param busy: Seconds spent working.
+        :param waited: Seconds spent blocked on the other stage.
+        """
+        self.items: int = items
+        self.busy: float = busy
+        self.waited: float = waited
+
+    def to_dict(self) -> dict:
+        return {
+            "items": self.items,
+            "busy": self.busy,
+            "waited": self.waited,
+            "fps": self.items / self.busy if self.busy else 0.0,
+        }
+
+
+class EncodeStage:
+    """
+    Converts frames and pipes them to ffmpeg on its own thread, fed by the compose loop through a
+    bounded queue. The pipe writes (and most of Pillow's conversion) release the GIL, so ffmpeg
+    backpressure no longer stalls composition. The bound keeps at most `maxsize` frames in memory.
+    """
+
+    def __init__(self, writer: FFmpegWriter, maxsize: int = 8):
+        """
+        :param writer: Opened writer.
+        :param maxsize: Frames queued before put blocks.
+        """
+        self._writer = writer
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._error: Union[Exception, None] = None
+        self.stats = StageStats()
+        self.blocked = 0.0
+
+    def start(self):
+        self._thread.start()
+
+    def put(self, image: Union[Image.Image, None]):
+        """
+        Queues a frame.
+        :param image: Frame, None repeats the previous one.
+        """
+        if self._error:
+            raise self._error
+
+        t1 = time.perf_counter()
+        self._queue.put(image)
+        self.blocked += time.perf_counter() - t1
+
+    def close(self):
+        """
+        Waits until every queued frame is written.
+        """
+        if self._thread.is_alive():
+            self._queue.put(_END)
+            self._thread.join()
+
+        if self._error:
+            raise self._error
+
+    def abort(self):
+        """
+        Drops the queued frames after a failed render, then aborts the writer.
+        """
+        if not self._error:
+            self._error = RuntimeError("Render aborted.")
+
+        if self._thread.is_alive():
+            self._queue.put(_END)
+            self._thread.join()
+
+        self._writer.abort()
+
+    def _run(self):
+        frame = None
+
+        while True:
+            t1 = time.perf_counter()
+            image = self._queue.get()
+            t2 = time.perf_counter()
+            self.stats.waited += t2 - t1
+
+            if image is _END:
+                return
+
+            # After a failure, keep draining so the compose loop never blocks.
+            if self._error:
+                continue
+
+            try:
+                if image is not None:
+                    frame = self._writer.to_bytes(image)
+                self._writer.write_bytes(frame)
+            except Exception as e:
+                self._error = e
+
+            self.stats.items += 1
+            self.stats.busy += time.perf_counter() - t2
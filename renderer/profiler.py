@@ -0,0 +1,107 @@
+import inspect
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Generator, Iterator
+
+
+def percentile(samples: list[float], p: float) -> float:
+    """
+    Nearest-rank percentile.
+    :param samples: Sorted samples.
+    :param p: 0 - 100.
+    :return:
+    """
+    if not samples:
+        return 0.0
+    return samples[max(round(p / 100 * len(samples)) - 1, 0)]
+
+
+class Profiler:
+    """
+    Opt-in timings of a render. Sections are timed with `section`, methods by wrapping them on
+    the instance (`instrument`), so a render without a profiler runs the plain methods and pays
+    nothing. Generators are timed over their whole iteration, one sample per call.
+    """
+
+    __slots__ = ["_samples", "counters"]
+
+    def __init__(self):
+        self._samples: dict[str, list[float]] = {}
+        self.counters: dict[str, Any] = {}
+
+    def add(self, name: str, seconds: float):
+        self._samples.setdefault(name, []).append(seconds)
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        t1 = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t1)
+
+    def instrument(self, obj: object, *names: str, prefix: str = ""):
+        """
+        Times the methods of an object, until the object is gone.
+        :param obj: Object.
+        :param names: Method names, recorded without the prefix.
+        :param prefix: Common prefix of the method names.
+        """
+        for name in names:
+            setattr(obj, name, self.timed(name[len(prefix) :], getattr(obj, name)))
+
+    def timed(self, name: str, method):
+        """
+        :param name: Recorded name.
+        :param method: Method to time.
+        :return: The timed method.
+        """
+
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            t1 = time.perf_counter()
+            result = method(*args, **kwargs)
+            elapsed = time.perf_counter() - t1
+
+            if inspect.isgenerator(result):
+                return self._iterate(name, result, elapsed)
+
+            self.add(name, elapsed)
+            return result
+
+        return wrapper
+
+    def _iterate(self, name: str, generator: Generator, elapsed: float):
+        while True:
+            t1 = time.perf_counter()
+
+            try:
+                item = next(generator)
+            except StopIteration:
+                self.add(name, elapsed + time.perf_counter() - t1)
+                return
+
+            elapsed += time.perf_counter() - t1
+            yield item
+
+    def to_dict(self) -> dict:
+        """
+        :return: Per name count, total, mean, p50, p90, p99 and max in seconds, and the counters.
+        """
+        timings = {}
+
+        for name, samples in self._samples.items():
+            samples = sorted(samples)
+            total = sum(samples)
+            timings[name] = {
+                "count": len(samples),
+                "total": total,
+                "mean": total / len(samples),
+                "p50": percentile(samples, 50),
+                "p90": percentile(samples, 90),
+                "p99": percentile(samples, 99),
+                "max": samples[-1],
+            }
+        return {"timings": timings, **self.counters}
@@ -0,0 +1,80 @@
+import json
+import time
+from typing import Union
+
+from rq.job import Job
+
+
+class ProgressReporter:
+    """
+    Throttled job progress. Status and progress are kept locally and written to the job meta
+    (one HSET) only when the status changes, or when the progress moved at least `step` and
+    `interval` ms went by since the last write. With a channel, every write is also published
+    so the bot can subscribe instead of polling the job.
+    """
+
+    def __init__(
+        self,
+        job: Job,
+        interval: int = 1000,
+        step: float = 0.05,
+        channel: Union[str, None] = None,
+    ):
+        """
+        :param job: The current job.
+        :param interval: Minimum time between progress writes in ms.
+        :param step: Minimum progress change between writes (0.0 - 1.0).
+        :param channel: Pub/sub channel to publish updates to.
+        """
+        self._job = job
+        self._interval = interval / 1000
+        self._step = step
+        self._channel = channel
+        self._last_time = 0.0
+        self._last_progress = 0.0
+        self.commands = 0
+
+    def update(self, progress: Union[float, None] = None, status: Union[str, None] = None, force=False):
+        """
+        Sets the progress and/or status, writing them if due.
+        :param progress: 0.0 - 1.0
+        :param status: Status text.
+        :param force: Write regardless of the throttle.
+        """
+        meta = self._job.meta
+        due = force
+
+        if status is not None and status != meta.get("status"):
+            meta["status"] = status
+            due = True
+
+        if progress is not None:
+            meta["progress"] = progress
+
+            if progress >= 1.0 or (
+                progress - self._last_progress >= self._step
+                and time.monotonic() - self._last_time >= self._interval
+            ):
+                due = True
+
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the meta (status, progress and anything else set on it) and publishes the update.
+        """
+        self._job.save_meta()
+        self.commands += 1
+
+        if self._channel:
+            message = {
+                "id": self._job.id,
+                "status": self._job.meta.get("status"),
+                "progress": self._job.meta.get("progress"),
+            }
+            self._job.connection.publish(self._channel, json.dumps(message))
+            self.commands += 1
+
+        self._last_time = time.monotonic()
+        self._last_progress = self._job.meta.get("progress") or 0.0
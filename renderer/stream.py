@@ -0,0 +1,44 @@
+import time
+from itertools import islice
+from typing import Iterator
+
+from renderer.data import States
+
+
+class StateStream:
+    """
+    States of a replay handed out while it is played (ReplayParser.get_info_stream), so the first
+    frames are rendered before parsing ends. Parsing runs on the compose thread between frames,
+    in the time the compose loop would otherwise spend waiting on the encoder. The parser may
+    replace the state of the current second until the next one is recorded, so a state is only
+    handed out once a later one exists, the last ones once the replay is played.
+    """
+
+    __slots__ = ["_states", "_played", "played", "elapsed"]
+
+    def __init__(self, states: dict[int, States], played: Iterator[float]):
+        """
+        :param states: The replay data's states, filled as the replay is played.
+        :param played: Generator playing the rest of the replay.
+        """
+        self._states = states
+        self._played = played
+        self.played: float = 0.0
+        self.elapsed: float = 0.0
+
+    def __iter__(self) -> Iterator[States]:
+        handed = 0
+        t1 = time.perf_counter()
+
+        for played in self._played:
+            if len(self._states) > handed + 1:
+                self.elapsed += time.perf_counter() - t1
+                self.played = played
+                key = next(islice(self._states, handed, None))
+                handed += 1
+                yield self._states[key]
+                t1 = time.perf_counter()
+
+        self.elapsed += time.perf_counter() - t1
+        self.played = 1.0
+        yield from islice(self._states.values(), handed, None)
@@ -0,0 +1,73 @@
+from typing import Union
+
+from PIL import Image, ImageFont
+
+from renderer.cache import MISSING, SHARED_CACHE
+
+
+def _font_key(font: ImageFont.FreeTypeFont) -> tuple:
+    # The fonts are loaded again by every renderer, so they are keyed by face and size.
+    return font.font.family, font.font.style, font.size
+
+
+def text_size(font: ImageFont.FreeTypeFont, text: str) -> tuple[int, int]:
+    """
+    Cached font.getsize.
+    :param font: Font.
+    :param text: Text.
+    :return: Width and height.
+    """
+    key = _font_key(font), text
+    size = SHARED_CACHE.get("text_size", key)
+
+    if size is MISSING:
+        size = font.getsize(text)
+        SHARED_CACHE.put("text_size", key, size)
+    return size
+
+
+def _get_tile(
+    font: ImageFont.FreeTypeFont, text: str, stroke_width: int
+) -> tuple[Image.Image, tuple[int, int]]:
+    key = _font_key(font), text, stroke_width
+    tile = SHARED_CACHE.get("text_tile", key)
+
+    if tile is MISSING:
+        mask, offset = font.getmask2(text, "L", stroke_width=stroke_width)
+        tile = Image.Image()._new(mask), offset
+        SHARED_CACHE.put("text_tile", key, tile)
+    return tile
+
+
+def draw_text(
+    image: Image.Image,
+    xy: tuple[int, int],
+    text: str,
+    font: ImageFont.FreeTypeFont,
+    fill: Union[str, tuple] = "white",
+    stroke_width: int = 0,
+    stroke_fill: Union[str, tuple, None] = None,
+):
+    """
+    Same result as ImageDraw.text, but the glyph masks of a string are rasterized once and
+    kept in the process-level cache. The color is applied when the mask is pasted, so a string
+    is cached once whatever its color.
+    :param image: Image to draw on.
+    :param xy: Position of the text.
+    :param text: Single line of text.
+    :param font: Font.
+    :param fill: Text color.
+    :param stroke_width: Stroke width.
+    :param stroke_fill: Stroke color, the text color if None.
+    """
+    x, y = xy
+    layers = [(0, fill)]
+
+    if stroke_width:
+        layers.insert(0, (stroke_width, fill if stroke_fill is None else stroke_fill))
+
+    for width, color in layers:
+        mask, (ox, oy) = _get_tile(font, text, width)
+
+        if mask.width and mask.height:
+            image.paste(color, (x + ox, y + oy), mask)
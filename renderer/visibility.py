@@ -0,0 +1,145 @@
+from math import hypot
+from typing import Union
+
+from renderer.data import DataShare, ReplayData, Ship, States, Weather
+
+
+class Observer:
+    """
+    The replay owner's ship and main squadron, deciding which ships are in (detection) range.
+    """
+
+    __slots__ = ["x", "y", "plane_x", "plane_y", "view_range", "is_alive"]
+
+    def __init__(self, view_range: float = 0.0):
+        """
+        :param view_range: Owner ship's detection range in km.
+        """
+        self.x: float = 0.0
+        self.y: float = 0.0
+        self.plane_x: float = 0.0
+        self.plane_y: float = 0.0
+        self.view_range: float = view_range
+        self.is_alive: bool = True
+
+    def update(self, states: States):
+        """
+        Moves to the owner's ship and main squadron of the state. Both keep their last known
+        position when they are missing.
+        :param states: Current states.
+        """
+        for ship in states.ships.values():
+            if ship.is_owner:
+                self.x, self.y = ship.x, ship.y
+                self.is_alive = ship.is_alive
+                break
+
+        for plane in states.planes.values():
+            if plane.relation == -1 and plane.purpose == 0:
+                self.plane_x, self.plane_y = plane.x, plane.y
+                break
+
+    def get_view_ranges(self, weather: Weather) -> tuple[float, float]:
+        """
+        Ship and squadron view ranges, clamped by the weather.
+        :param weather: Current weather.
+        :return: Ship view range, squadron view range in km.
+        """
+        if weather and weather.vision_distance_ship:
+            ship_view_range = min(self.view_range, weather.vision_distance_ship * 0.03)
+        else:
+            ship_view_range = self.view_range
+
+        if weather and weather.vision_distance_plane:
+            plane_view_range = min(15, weather.vision_distance_plane * 0.03)
+        else:
+            plane_view_range = 15
+        return ship_view_range, plane_view_range
+
+    def in_range(self, ships: list[Ship], weather: Weather) -> list[bool]:
+        """
+        Whether each ship is within the owner's ship or squadron view range, for all the ships
+        of a state at once. Everything is in range once the owner is sunk.
+        :param ships: Ships.
+        :param weather: Current weather.
+        :return: In range flags, in the order of the ships.
+        """
+        if not self.is_alive:
+            return [True] * len(ships)
+
+        ship_view_range, plane_view_range = self.get_view_ranges(weather)
+        x, y, plane_x, plane_y = self.x, self.y, self.plane_x, self.plane_y
+        return [
+            hypot(ship.x - x, ship.y - y) * 0.03 <= ship_view_range
+            or hypot(ship.x - plane_x, ship.y - plane_y) * 0.03 <= plane_view_range
+            for ship in ships
+        ]
+
+
+def get_observations(
+    replay_data: ReplayData, view_range: float
+) -> dict[int, dict[int, int]]:
+    """
+    Health of the ships the replay owner has in range, per tick.
+    :param replay_data: One side's replay.
+    :param view_range: Owner ship's detection range in km.
+    :return: Clock (state key) -> account id -> health.
+    """
+    observer = Observer(view_range)
+    players = replay_data.players
+    observations = {}
+
+    for clock, states in replay_data.states.items():
+        observer.update(states)
+        ships = list(states.ships.values())
+        observations[clock] = {
+            players[ship.avatar_id].account_id: ship.health
+            for ship, in_range in zip(ships, observer.in_range(ships, states.weather))
+            if in_range
+        }
+    return observations
+
+
+class VisibilityTable:
+    """
+    Per tick visibility and health of every ship, merged from the observations of both sides of
+    a dual render. A ship is in range when either owner has it in range; its health is the last
+    one seen in range by either side. Built once before rendering, so the two sides don't share
+    state while they render.
+    """
+
+    __slots__ = ["_ticks"]
+
+    def __init__(self, ticks: dict[int, dict[int, DataShare]]):
+        self._ticks = ticks
+
+    @classmethod
+    def merge(cls, *observations: dict[int, dict[int, int]]) -> "VisibilityTable":
+        """
+        :param observations: get_observations of each side.
+        :return:
+        """
+        clocks = sorted({c for o in observations for c in o}, reverse=True)
+        health: dict[int, int] = {}
+        ticks = {}
+
+        for clock in clocks:
+            seen = set()
+
+            for side in observations:
+                for account_id, ship_health in side.get(clock, {}).items():
+                    health[account_id] = ship_health
+                    seen.add(account_id)
+
+            tick = {}
+
+            for account_id, ship_health in health.items():
+                ds = DataShare()
+                ds.health = ship_health
+                ds.in_range = account_id in seen
+                tick[account_id] = ds
+            ticks[clock] = tick
+        return cls(ticks)
+
+    def get(self, clock: int, account_id: int) -> Union[DataShare, None]:
+        return self._ticks.get(clock, {}).get(account_id, None)
@@ -0,0 +1,275 @@
+import os
+import subprocess
+from typing import Optional, Union
+
+from imageio_ffmpeg import get_ffmpeg_exe
+from PIL import Image
+
+from renderer.audio import AudioPlan
+
+CODECS = ("libx264", "libx265", "libvpx-vp9")
+PRESETS = (
+    "ultrafast",
+    "superfast",
+    "veryfast",
+    "faster",
+    "fast",
+    "medium",
+    "slow",
+    "slower",
+    "veryslow",
+)
+PIX_FMTS_IN = ("rgba", "rgb24", "yuv420p")
+
+# libvpx has no x264 style presets, map them to -cpu-used.
+VP9_CPU_USED = dict(zip(PRESETS, (8, 7, 6, 5, 4, 3, 2, 1, 0)))
+
+
+class EncoderProfile:
+    __slots__ = ["codec", "preset", "crf", "threads", "tune", "pix_fmt_in"]
+
+    def __init__(
+        self,
+        codec="libx264",
+        preset="medium",
+        crf=15,
+        threads=0,
+        tune: Optional[str] = None,
+        pix_fmt_in="rgb24",
+    ):
+        assert codec in CODECS, f"Unsupported codec {codec}"
+        assert preset in PRESETS, f"Unsupported preset {preset}"
+        assert pix_fmt_in in PIX_FMTS_IN, f"Unsupported input pixel format {pix_fmt_in}"
+
+        self.codec: str = codec
+        self.preset: str = preset
+        self.crf: int = crf
+        self.threads: int = threads
+        self.tune: Optional[str] = tune
+        self.pix_fmt_in: str = pix_fmt_in
+
+    @classmethod
+    def from_quality(cls, quality: int, codec="libx264", **kwargs):
+        """
+        Creates a profile from the 0 - 10 quality setting (same scale imageio-ffmpeg used).
+        :param quality: 0 (worst) - 10 (best).
+        :param codec: Video codec.
+        :param kwargs: Other profile fields.
+        :return: EncoderProfile
+        """
+        assert 0 <= quality <= 10, "Quality should be within 0 and 10."
+        max_crf = 63 if codec == "libvpx-vp9" else 51
+        return cls(codec=codec, crf=int((1 - quality / 10) * max_crf), **kwargs)
+
+    def to_dict(self) -> dict:
+        return {attr: getattr(self, attr) for attr in self.__slots__}
+
+    def codec_args(self) -> list[str]:
+        """
+        Encoder arguments for ffmpeg.
+        :return:
+        """
+        args = ["-c:v", self.codec, "-crf", str(self.crf)]
+
+        if self.codec == "libvpx-vp9":
+            args += ["-b:v", "0", "-deadline", "good", "-row-mt", "1"]
+            args += ["-cpu-used", str(VP9_CPU_USED[self.preset])]
+        else:
+            args += ["-preset", self.preset]
+
+        if self.tune:
+            args += ["-tune", self.tune]
+
+        args += ["-threads", str(self.threads)]
+        return args
+
+
+class FFmpegWriter:
+    """
+    Pipes raw frames to an ffmpeg process.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: tuple[int, int],
+        fps: float,
+        profile: Union[EncoderProfile, None] = None,
+        audio: Union[AudioPlan, None] = None,
+        output_params: Union[list, None] = None,
+        holds: Union[dict[int, float], None] = None,
+        hold_end: float = 0.0,
+        scale: float = 1.0,
+    ):
+        """
+        :param path: Output path.
+        :param size: Frame size.
+        :param fps: Frame rate.
+        :param profile: Encoder profile.
+        :param audio: Audio to mux in.
+        :param output_params: Extra output arguments.
+        :param holds: Frame index -> seconds to freeze that frame for (pauses).
+        :param hold_end: Seconds to freeze the last frame for.
+        :param scale: Output size relative to the frame size.
+        """
+        self._path = path
+        self._size = size
+        self._fps = fps
+        self._profile = profile if profile else EncoderProfile()
+        self._audio = audio
+        self._output_params = output_params if output_params else []
+        self._holds = holds if holds else {}
+        self._hold_end = hold_end
+        self._scale = scale
+        self._process: Union[subprocess.Popen, None] = None
+        self.frames_written = 0
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type:
+            self.abort()
+        else:
+            self.close()
+
+    def get_command(self) -> list[str]:
+        w, h = self._size
+        pix_fmt_in = self._profile.pix_fmt_in
+
+        # PIL's YCbCr is full range (JPEG), tell ffmpeg.
+        if pix_fmt_in == "yuv420p":
+            pix_fmt_in = "yuvj420p"
+
+        cmd = [get_ffmpeg_exe(), "-y", "-hide_banner", "-nostats", "-loglevel", "error"]
+        cmd += ["-f", "rawvideo", "-vcodec", "rawvideo", "-s", f"{w}x{h}"]
+        cmd += ["-pix_fmt", pix_fmt_in, "-r", str(self._fps), "-i", "-"]
+
+        if self._audio:
+            audio_input_args, audio_output_args = self._audio.get_args()
+            cmd += audio_input_args + audio_output_args
+
+        cmd += self._profile.codec_args()
+        cmd += ["-pix_fmt", "yuv420p"]
+
+        if filters := self.get_filters():
+            cmd += ["-vf", ",".join(filters)]
+
+        cmd += self._output_params
+        cmd.append(self._path)
+        return cmd
+
+    def get_filters(self) -> list[str]:
+        """
+        Video filters. Frozen frames are repeated by ffmpeg instead of being piped again.
+        :return:
+        """
+        w, h = self._size
+        filters = []
+
+        # Before the loops, tpad relies on the input's end timestamp.
+        if count := round(self._hold_end * self._fps):
+            filters.append(f"tpad=stop_mode=clone:stop={count}")
+
+        # Latest first, so the frame numbers of the earlier holds are not shifted.
+        for index, seconds in sorted(self._holds.items(), reverse=True):
+            if count := round(seconds * self._fps):
+                filters.append(f"loop=loop={count}:size=1:start={index}")
+
+        # yuv420p needs even dimensions.
+        if self._scale != 1.0:
+            filters.append(
+                f"scale=trunc(iw*{self._scale}/2)*2:trunc(ih*{self._scale}/2)*2"
+            )
+        elif w % 2 or h % 2:
+            filters.append("pad=ceil(iw/2)*2:ceil(ih/2)*2")
+        return filters
+
+    def open(self):
+        self._process = subprocess.Popen(
+            self.get_command(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+
+    def write(self, image: Image.Image):
+        """
+        Sends a frame to ffmpeg.
+        :param image: Frame with the writer's size.
+        """
+        self.write_bytes(self.to_bytes(image))
+
+    def write_bytes(self, data: bytes):
+        """
+        Sends an already converted frame to ffmpeg.
+        :param data: Frame from to_bytes.
+        """
+        try:
+            self._process.stdin.write(data)
+        except BrokenPipeError:
+            raise RuntimeError(f"ffmpeg exited early: {self._read_error()}")
+        self.frames_written += 1
+
+    def to_bytes(self, image: Image.Image) -> bytes:
+        """
+        Converts the frame to the profile's input pixel format.
+        :param image: Frame.
+        :return: Raw frame.
+        """
+        pix_fmt_in = self._profile.pix_fmt_in
+
+        if pix_fmt_in == "rgba":
+            return image.tobytes()
+        elif pix_fmt_in == "rgb24":
+            return image.convert("RGB").tobytes()
+        else:
+            y, cb, cr = image.convert("YCbCr").split()
+            half = (image.width + 1) // 2, (image.height + 1) // 2
+            cb = cb.resize(half, resample=Image.BOX)
+            cr = cr.resize(half, resample=Image.BOX)
+            return y.tobytes() + cb.tobytes() + cr.tobytes()
+
+    def close(self):
+        if not self._process:
+            return
+
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+
+        return_code = self._process.wait()
+        error = self._read_error()
+        self._process = None
+
+        if return_code != 0:
+            raise RuntimeError(f"ffmpeg failed ({return_code}): {error}")
+
+    def abort(self):
+        """
+        Kills ffmpeg after a failed render and removes the partial output.
+        """
+        if self._process:
+            self._process.kill()
+
+            for pipe in (self._process.stdin, self._process.stderr):
+                try:
+                    pipe.close()
+                except OSError:
+                    pass
+
+            self._process.wait()
+            self._process = None
+
+        try:
+            os.remove(self._path)
+        except FileNotFoundError:
+            pass
+
+    def _read_error(self) -> str:
+        try:
+            return self._process.stderr.read().decode(errors="ignore").strip()
+        except Exception:
+            return ""
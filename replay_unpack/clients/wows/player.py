@@ -40,6 +40,10 @@ class ReplayPlayer(ControlledPlayerBase):
     def _get_packets_mapping(self):
         return PACKETS_MAPPING
 
+    @property
+    def states(self):
+        return self._battle_controller.states
+
     def _process_packet(self, packet, packet_time):
         self._battle_controller.packet_time(packet_time)
 
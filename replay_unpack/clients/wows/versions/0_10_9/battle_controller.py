@@ -374,6 +374,10 @@ class BattleController(IBattleController):
     def entities(self):
         return self._entities
 
+    @property
+    def states(self) -> Dict[int, States]:
+        return self._dict_states
+
     @property
     def battle_logic(self):
         return next(e for e in self._entities.values() if e.get_name() == 'BattleLogic')
@@ -29,6 +29,13 @@ class PlayerBase:
         raise NotImplementedError
 
     def play(self, replay_data, strict_mode=False):
+        for _ in self.iter_play(replay_data, strict_mode):
+            pass
+
+    def iter_play(self, replay_data, strict_mode=False):
+        """
+        Plays the replay one packet at a time, yielding the share of it played so far.
+        """
         io = BytesIO(replay_data)
         while io.tell() != len(replay_data):
             packet = NetPacket(io)
@@ -39,6 +46,7 @@ class PlayerBase:
                                   packet.time, packet.type, self._mapping.get(packet.type))
                 if strict_mode:
                     raise
+            yield io.tell() / len(replay_data)
 
 
 class ControlledPlayerBase(PlayerBase, ABC):
@@ -54,15 +54,43 @@ class ReplayParser(object):
 
         return result
 
-    def _get_hidden_data(self, replay: ReplayInfo):
-        player = wows.ReplayPlayer(replay.engine_data
-                                   .get('clientVersionFromXml')
-                                   .replace(' ', '')
-                                   .split(','))
+    def get_info_stream(self):
+        """
+        get_info for consuming the states while the replay is played. The replay is played up
+        to its first state, the rest is played by the returned generator. The replay data
+        (states, deaths, frags...) fills as it is consumed, the rest of the hidden data is as of
+        the first state.
+        :return: Result, generator of the share of the replay played.
+        """
+        replay = self._reader.get_replay_data()
+        player = self._get_player(replay)
+        played = player.iter_play(replay.decrypted_data, self._is_strict_mode)
 
+        for _ in played:
+            if player.states:
+                break
+
+        result = {
+            "open": replay.engine_data,
+            "extra_data": replay.extra_data,
+            "hidden": player.get_info(),
+            "error": None
+        }
+
+        return result, played
+
+    def _get_hidden_data(self, replay: ReplayInfo):
+        player = self._get_player(replay)
         player.play(replay.decrypted_data, self._is_strict_mode)
         return player.get_info()
 
+    @staticmethod
+    def _get_player(replay: ReplayInfo):
+        return wows.ReplayPlayer(replay.engine_data
+                                 .get('clientVersionFromXml')
+                                 .replace(' ', '')
+                                 .split(','))
+
 
 # if __name__ == '__main__':
 #     import argparse
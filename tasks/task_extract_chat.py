@@ -4,28 +4,31 @@ import time
 
 from io import StringIO
 from utils.redisconn import REDIS
-from utils.settings import retrieve_from_env
+from utils.spool import SPOOL
+from utils.settings import retrieve_from_env, retrieve_progress_settings
 from utils.exception import (
     VersionNotFoundError,
     ReadingError,
     UnsupportedBattleTypeError,
 )
 from renderer.data import ReplayData
+from renderer.progress import ProgressReporter
 from replay_unpack.replay_parser import ReplayParser
 from rq import get_current_job
 from rq.job import Job
 
 
-def task_extract_chat(data: bytes, requester_id: int):
+def task_extract_chat(key: str, requester_id: int):
     job: Job = get_current_job()
+    progress = ProgressReporter(job, **retrieve_progress_settings())
 
     try:
         t1 = time.perf_counter()
-        job.meta["status"] = "Reading"
-        job.save_meta()
+        progress.update(status="Reading")
 
         try:
-            replay_info = ReplayParser(data).get_info()
+            with SPOOL.open(key) as data:
+                replay_info = ReplayParser(data).get_info()
         except RuntimeError:
             raise VersionNotFoundError("Version not found")
         except Exception:
@@ -67,6 +70,7 @@ def task_extract_chat(data: bytes, requester_id: int):
     except Exception as e:
         return e
     finally:
+        SPOOL.remove(key)
         REDIS.set(
             f"cooldown_{requester_id}", "", ex=retrieve_from_env("TASK_COOLDOWN", int)
         )
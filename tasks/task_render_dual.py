@@ -3,11 +3,19 @@ import string
 import time
 import os
 import zipfile
-import tempfile
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import Union
 
-from io import BytesIO
 from utils.redisconn import REDIS
-from utils.settings import retrieve_from_env
+from utils.spool import SPOOL
+from utils.settings import (
+    retrieve_from_env,
+    retrieve_encoder_settings,
+    retrieve_progress_settings,
+    retrieve_queue_setting,
+)
 from utils.exception import (
     VersionNotFoundError,
     ReadingError,
@@ -19,11 +27,23 @@ from utils.exception import (
 )
 from renderer import get_renderer
 from renderer.data import ReplayData
+from renderer.helpers import alpha_paste
+from renderer.pipeline import EncodeStage
+from renderer.progress import ProgressReporter
+from renderer.visibility import VisibilityTable
+from renderer.writer import EncoderProfile, FFmpegWriter
 from replay_unpack.replay_parser import ReplayParser
 from rq import get_current_job
 from rq.job import Job
 from PIL import Image
-from imageio_ffmpeg import write_frames
+
+FRAME_SIZE = (800, 850)
+FRAME_BYTES = FRAME_SIZE[0] * FRAME_SIZE[1] * 4
+# Frames the ally side can render ahead of the composite.
+FRAME_SLOTS = 4
+# Where the enemy side's sprites are drawn on the ally frame (its minimap).
+MINIMAP_POS = (0, 50)
+MINIMAP_BOX = (0, 50, 800, 850)
 
 
 def delete_temp_files(*files):
@@ -60,13 +80,129 @@ class Parser:
         return replay_data
 
 
-def task_render_dual(data: bytes, requester_id: int):
+def render_side(
+    conn: Connection,
+    data: bytes,
+    as_enemy: bool,
+    frames_name: Union[str, None],
+    task_conns: list[Connection],
+):
+    """
+    Parses one replay and renders its side of a dual render in its own process.
+
+    Sends ("parsed", arena id, total, visibility observations), receives the frame count and
+    the merged VisibilityTable (None aborts), then renders on its own. The ally side writes each
+    frame to slot idx % FRAME_SLOTS of the shared memory and announces it with ("frame", slot);
+    a slot is only rewritten once the task acknowledged reading it. The enemy side only sends
+    ("frame", sprites), each sprite being (RGBA bytes, size, minimap position). Ends with
+    ("done", cache stats), or ("error", exception) at any point. A None from the task at any
+    point aborts, so does the task closing its end.
+    :param conn: Connection to the task.
+    :param data: Replay file.
+    :param as_enemy: Render the enemy side.
+    :param frames_name: Shared memory of FRAME_SLOTS frames, None for the enemy side.
+    :param task_conns: The task's ends of the pipes, inherited through fork. Closed right away,
+    otherwise this side would keep its own pipe open and never see the task close it.
+    """
+    for task_conn in task_conns:
+        task_conn.close()
+
+    frames = SharedMemory(name=frames_name) if frames_name else None
+
+    try:
+        replay_data = Parser(data).parse()
+
+        try:
+            renderer_cls = get_renderer(replay_data.version)
+        except ModuleNotFoundError:
+            raise VersionNotFoundError("Version unsupported.")
+
+        side = renderer_cls(replay_data=replay_data, dual=True, as_enemy=as_enemy)
+        conn.send(
+            ("parsed", replay_data.arena_id, side.get_total(), side.get_observations())
+        )
+
+        if (message := conn.recv()) is None:
+            return
+
+        total, table = message
+
+        try:
+            renderer = renderer_cls(
+                replay_data=replay_data, dual=True, as_enemy=as_enemy, share=table
+            )
+
+            if as_enemy:
+                for idx, sprites in enumerate(renderer.sprites()):
+                    # Nothing but an abort is sent to this side once it renders.
+                    if conn.poll():
+                        return
+
+                    conn.send(("frame", [_pack(*sprite) for sprite in sprites]))
+
+                    if idx + 1 == total:
+                        break
+            else:
+                for idx, image in enumerate(renderer.generator()):
+                    if idx >= FRAME_SLOTS and conn.recv() is None:
+                        return
+
+                    offset = idx % FRAME_SLOTS * FRAME_BYTES
+                    frames.buf[offset : offset + FRAME_BYTES] = image.tobytes()
+                    conn.send(("frame", idx % FRAME_SLOTS))
+
+                    if idx + 1 == total:
+                        break
+        except Exception:
+            raise RenderingError("Rendering failed.")
+
+        conn.send(("done", renderer.get_cache_stats()))
+    except Exception as e:
+        try:
+            conn.send(("error", e))
+        except OSError:
+            # The task already closed its end.
+            pass
+    finally:
+        conn.close()
+
+        if frames:
+            frames.close()
+
+
+def _pack(image: Image.Image, xy: tuple[int, int]) -> tuple:
+    if image.mode != "RGBA":
+        image = image.convert("RGBA")
+    return image.tobytes(), image.size, xy
+
+
+def _read_frame(frames: SharedMemory, slot: int) -> Image.Image:
+    offset = slot * FRAME_BYTES
+
+    # Copied so no view of the shared memory outlives the frame (it could not be closed).
+    with frames.buf[offset : offset + FRAME_BYTES] as view:
+        return Image.frombytes("RGBA", FRAME_SIZE, bytes(view))
+
+
+def _receive(conn: Connection, expected: str) -> tuple:
+    message = conn.recv()
+
+    if message[0] == "error":
+        raise message[1]
+
+    assert message[0] == expected, f"Unexpected message {message[0]}"
+    return message[1:]
+
+
+def task_render_dual(key: str, requester_id: int):
     job: Job = get_current_job()
+    progress = ProgressReporter(job, **retrieve_progress_settings())
+    sides = []
 
     try:
         t1 = time.perf_counter()
-        with BytesIO(data) as zip_data:
-            zip_obj = zipfile.ZipFile(zip_data)
+        # The zip is read from its path, mmap objects are not seekable file objects.
+        with zipfile.ZipFile(SPOOL.path(key)) as zip_obj:
 
             if len(zip_obj.namelist()) > 2:
                 raise MultipleReplaysError("Too much replay files in zip")
@@ -92,57 +228,102 @@ def task_render_dual(data: bytes, requester_id: int):
                     f"No replay files found starting with {not_found}"
                 )
 
-            job.meta["status"] = "Reading Replay A..."
-            job.save_meta()
-            replay_data_a = Parser(replay_files["a"]).parse()
-            job.meta["status"] = "Reading Replay B..."
-            job.save_meta()
-            replay_data_b = Parser(replay_files["b"]).parse()
+            progress.update(status="Reading Replays...")
+
+            for prefix, as_enemy in (("a", False), ("b", True)):
+                conn, child_conn = Pipe()
+                # The enemy side's sprites are small enough to go through the pipe.
+                frames = (
+                    None
+                    if as_enemy
+                    else SharedMemory(create=True, size=FRAME_SLOTS * FRAME_BYTES)
+                )
+                process = Process(
+                    target=render_side,
+                    args=(
+                        child_conn,
+                        replay_files[prefix],
+                        as_enemy,
+                        frames.name if frames else None,
+                        [conn] + [task_conn for _, task_conn, _ in sides],
+                    ),
+                    daemon=True,
+                )
+                sides.append((process, conn, frames))
+                process.start()
+                child_conn.close()
+
+            (arena_a, total_a, seen_a), (arena_b, total_b, seen_b) = (
+                _receive(conn, "parsed") for _, conn, _ in sides
+            )
 
-            if replay_data_a.arena_id != replay_data_b.arena_id:
+            if arena_a != arena_b:
                 raise ArenaIdMismatchError("Arena IDs do not match.")
 
-            try:
-                share = {}
+            total = min(total_a, total_b)
+            table = VisibilityTable.merge(seen_a, seen_b)
 
-                renderer_a = get_renderer(replay_data_a.version)(
-                    replay_data=replay_data_a, dual=True, as_enemy=False, share=share
-                )
-                renderer_b = get_renderer(replay_data_b.version)(
-                    replay_data=replay_data_b, dual=True, as_enemy=True, share=share
-                )
+            for _, conn, _ in sides:
+                conn.send((total, table))
 
-                total = min(renderer_a.get_total(), renderer_b.get_total())
+            fps = retrieve_queue_setting(job.origin, "FPS", required=True)
+            quality = retrieve_queue_setting(job.origin, "QUALITY", required=True)
+            video_path = SPOOL.new_temp(".mp4")
 
-                video_file = tempfile.NamedTemporaryFile(
-                    "w+b", suffix=".mp4", delete=False
+            try:
+                writer = FFmpegWriter(
+                    path=video_path,
+                    size=FRAME_SIZE,
+                    fps=fps,
+                    profile=EncoderProfile.from_quality(
+                        quality, **retrieve_encoder_settings(job.origin)
+                    ),
                 )
-                writer = write_frames(
-                    path=video_file.name,
-                    fps=30,
-                    macro_block_size=25,
-                    quality=9,
-                    size=(800, 850),
-                    pix_fmt_in="rgba",
+                writer.open()
+                encoder = EncodeStage(writer)
+                encoder.start()
+                (_, conn_a, frames_a), (_, conn_b, _) = sides
+
+                try:
+                    for idx in range(total):
+                        (slot,), (sprites,) = _receive(conn_a, "frame"), _receive(
+                            conn_b, "frame"
+                        )
+                        image = _read_frame(frames_a, slot)
+                        # The slot is free again, the ally side waits for it from FRAME_SLOTS on.
+                        if idx + FRAME_SLOTS < total:
+                            conn_a.send(True)
+
+                        # Composited straight onto the ally frame, clipped to its minimap.
+                        for sprite_bytes, size, (x, y) in sprites:
+                            alpha_paste(
+                                image,
+                                Image.frombytes("RGBA", size, sprite_bytes),
+                                (x + MINIMAP_POS[0], y + MINIMAP_POS[1]),
+                                MINIMAP_BOX,
+                            )
+
+                        encoder.put(image)
+                        progress.update(progress=(idx + 1) / total)
+
+                    encoder.close()
+                    writer.close()
+                except BaseException:
+                    # Kills ffmpeg, a side's error would otherwise leave it running.
+                    encoder.abort()
+                    raise
+
+                (stats_a,), (stats_b,) = _receive(conn_a, "done"), _receive(
+                    conn_b, "done"
                 )
-                writer.send(None)
-
-                for idx, (a, b) in enumerate(
-                    zip(renderer_a.generator(), renderer_b.generator())
-                ):
-                    new_image = Image.alpha_composite(a, b)
-                    writer.send(new_image.__array__())
-                    job.meta["progress"] = (idx + 1) / total
-                    job.save_meta()
-
-                writer.close()
-            except ModuleNotFoundError:
-                raise VersionNotFoundError("Version unsupported.")
+                job.meta["cache"] = {"a": stats_a, "b": stats_b}
+                job.meta["pipeline"] = {"encode": encoder.stats.to_dict()}
+                progress.flush()
             except Exception:
+                delete_temp_files(video_path)
                 raise RenderingError("Rendering failed.")
 
-            with open(video_file.name, "rb") as f:
-                video_data = f.read()
+            video_key = SPOOL.put_output(video_path)
 
             t2 = time.perf_counter()
             str_taken = time.strftime("%M:%S", time.gmtime(t2 - t1))
@@ -150,10 +331,28 @@ def task_render_dual(data: bytes, requester_id: int):
                 random.choice(string.ascii_uppercase[:6]) for _ in range(4)
             )
             random_str += "".join(random.choice(string.digits) for _ in range(8))
-            return video_data, random_str, str_taken
+            return video_key, random_str, str_taken
     except Exception as e:
         return e
     finally:
+        for process, conn, frames in sides:
+            # Tells a side still waiting for the frame count to stop.
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+            process.join(timeout=5)
+
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+            if frames:
+                frames.close()
+                frames.unlink()
+
+        SPOOL.remove(key)
         REDIS.set(
             f"cooldown_{requester_id}", "", ex=retrieve_from_env("TASK_COOLDOWN", int)
         )
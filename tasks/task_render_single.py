@@ -1,39 +1,79 @@
+import json
 import random
 import string
 import time
+from typing import Iterator, Union
 
+from utils.logger import LOGGER_WORKER
 from utils.redisconn import REDIS
-from utils.settings import retrieve_from_db, retrieve_from_env
+from utils.spool import SPOOL
+from utils.settings import (
+    retrieve_from_env,
+    retrieve_encoder_settings,
+    retrieve_progress_settings,
+    retrieve_queue_setting,
+    retrieve_render_budget,
+)
 from utils.exception import (
     VersionNotFoundError,
     ReadingError,
     RenderingError,
     UnsupportedBattleTypeError,
+    EmptyClipError,
 )
 from renderer import get_renderer
 from renderer.data import ReplayData
+from renderer.profiler import Profiler
+from renderer.progress import ProgressReporter
+from renderer.stream import StateStream
+from renderer.writer import EncoderProfile
 from replay_unpack.replay_parser import ReplayParser
 from rq import get_current_job
 from rq.job import Job
 
 
 def task_render_single(
-    data: bytes, requester_id: int, logs=False, benny=False, doom=False
+    key: str,
+    requester_id: int,
+    logs=False,
+    benny=False,
+    doom=False,
+    window: Union[tuple[int, int], None] = None,
+    focus=False,
 ):
     job: Job = get_current_job()
+    progress = ProgressReporter(job, **retrieve_progress_settings())
+    profiler = (
+        Profiler()
+        if retrieve_from_env("RENDER_PROFILE", int, allow_none=True)
+        else None
+    )
 
     try:
+        fps = retrieve_queue_setting(job.origin, "FPS", required=True)
+        quality = retrieve_queue_setting(job.origin, "QUALITY", required=True)
         t1 = time.perf_counter()
-        job.meta["status"] = "Reading"
-        job.save_meta()
+        progress.update(status="Reading")
+        budget = retrieve_render_budget(job.origin)
+        # Rendered while the replay is played, unless the whole timeline is needed up front (a budget
+        # is planned from the replay's length).
+        streamed = not (window or focus or doom or budget)
+        stream = None
 
         try:
-            replay_info = ReplayParser(data).get_info()
+            with SPOOL.open(key) as data:
+                if streamed:
+                    replay_info, played = ReplayParser(data).get_info_stream()
+                else:
+                    replay_info = ReplayParser(data).get_info()
         except RuntimeError:
             raise VersionNotFoundError("Version not supported.")
         except Exception:
             raise ReadingError("Reading failed.")
 
+        if profiler:
+            profiler.add("parse", time.perf_counter() - t1)
+
         replay_data: ReplayData = replay_info["hidden"]["replay_data"]
         replay_data.match.battle_type = replay_info["open"]["gameMode"]
         replay_data.match.match_group = replay_info["open"]["matchGroup"]
@@ -44,17 +84,45 @@ def task_render_single(
         if replay_data.match.battle_type not in [7, 11, 14, 15, 16]:
             raise UnsupportedBattleTypeError("Unsupported battle type.")
 
+        if streamed:
+            if not replay_data.states:
+                raise EmptyClipError("Nothing to render.")
+
+            stream = StateStream(replay_data.states, _read(played))
+
+        video_path = SPOOL.new_temp(".mp4")
+
+        # Whatever reading left of the render budget.
+        if budget:
+            budget -= time.perf_counter() - t1
+
         try:
-            video_data = get_renderer(replay_data.version)(
+            renderer = get_renderer(replay_data.version)(
                 replay_data=replay_data,
-                fps=retrieve_from_db("FPS"),
-                quality=retrieve_from_db("QUALITY"),
+                fps=fps,
+                quality=quality,
                 logs=logs,
                 benny=benny,
                 doom=doom,
-            ).start()
+                encoder=EncoderProfile.from_quality(
+                    quality, **retrieve_encoder_settings(job.origin)
+                ),
+                progress=progress,
+                budget=budget,
+                window=window,
+                focus=focus,
+                profiler=profiler,
+                stream=stream,
+            )
+
+            if not stream and not renderer.get_total():
+                raise EmptyClipError("Nothing to render.")
+
+            renderer.start(video_path)
         except ModuleNotFoundError:
             raise VersionNotFoundError("Unsupported version.")
+        except (EmptyClipError, ReadingError):
+            raise
         except Exception:
             raise RenderingError("Rendering failed.")
 
@@ -64,10 +132,34 @@ def task_render_single(
             random.choice(string.ascii_uppercase[:6]) for _ in range(4)
         )
         random_str += "".join(random.choice(string.digits) for _ in range(8))
-        return video_data, random_str, str_taken
+
+        video_key = SPOOL.put_output(video_path)
+
+        if profiler:
+            profiler.add("store", time.perf_counter() - t2)
+            job.meta["profile"] = profiler.to_dict()
+            job.save_meta()
+            LOGGER_WORKER.info(
+                json.dumps({"job": job.id, "profile": job.meta["profile"]})
+            )
+
+        return video_key, random_str, str_taken
     except Exception as e:
         return e
     finally:
+        SPOOL.remove(key)
         REDIS.set(
             f"cooldown_{requester_id}", "", ex=retrieve_from_env("TASK_COOLDOWN", int)
         )
+
+
+def _read(played: Iterator[float]) -> Iterator[float]:
+    """
+    Plays the rest of a streamed replay, a parsing failure is still a reading error.
+    :param played: Generator from ReplayParser.get_info_stream.
+    :return:
+    """
+    try:
+        yield from played
+    except Exception:
+        raise ReadingError("Reading failed.")
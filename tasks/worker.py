@@ -1,11 +1,20 @@
 from utils.redisconn import REDIS
-from rq.worker import Worker
+from utils.settings import retrieve_from_env
+from renderer.cache import configure_shared_cache
+from rq.worker import SimpleWorker, Worker
 from rq import Queue, Connection
 from typing import Union
 
 def run_worker(queues: Union[list, None]):
     queues = queues if queues else ['single', 'dual', 'chat']
 
+    if cache_size := retrieve_from_env("SPRITE_CACHE_SIZE", int, allow_none=True):
+        configure_shared_cache(cache_size * 1024 * 1024)
+
+    # A warm worker runs the jobs in its own process instead of forking a work horse for each job,
+    # so the process-level sprite cache survives between renders.
+    worker_class = SimpleWorker if retrieve_from_env("WORKER_WARM", int, allow_none=True) else Worker
+
     with Connection(REDIS):
-        worker = Worker(map(Queue, queues))
-        worker.work()
\ No newline at end of file
+        worker = worker_class(map(Queue, queues))
+        worker.work()
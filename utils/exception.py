@@ -23,4 +23,8 @@ class NotEnoughReplaysError(Exception):
 
 
 class ArenaIdMismatchError(Exception):
+    pass
+
+
+class EmptyClipError(Exception):
     pass
\ No newline at end of file
@@ -36,3 +36,84 @@ def retrieve_from_env(setting_name: str, converter: Callable, allow_none=False)
             raise e
 
 
+# Values a queue uses when a setting isn't set for it, instead of the global ones. Dual renders were
+# always 30 fps at quality 9.
+QUEUE_DEFAULTS: dict[str, dict[str, Union[int, str]]] = {"dual": {"FPS": 30, "QUALITY": 9}}
+
+
+def retrieve_queue_setting(
+    queue: Union[str, None], setting_name: str, required=False
+) -> Union[list, int, str, None]:
+    """
+    A setting of a queue ({SETTINGS_PREFIX}.{queue}.{setting_name}), falling back to the queue's default
+    (QUEUE_DEFAULTS), then to the global one.
+    :param queue: Queue name, None for the global setting only.
+    :param setting_name: Setting name.
+    :param required: Raise instead of returning None.
+    :return: The value, None if none is set.
+    :raises RuntimeError: Required and none is set.
+    """
+    if queue:
+        try:
+            return retrieve_from_db(f"{queue}.{setting_name}")
+        except RuntimeError:
+            pass
+
+        if (default := QUEUE_DEFAULTS.get(queue, {}).get(setting_name)) is not None:
+            return default
+
+    try:
+        return retrieve_from_db(setting_name)
+    except RuntimeError:
+        pass
+
+    if required:
+        queue_key = f"{SETTINGS_PREFIX}.{queue}.{setting_name} or " if queue else ""
+        raise RuntimeError(f"Setting {setting_name} isn't set ({queue_key}{SETTINGS_PREFIX}.{setting_name}).")
+    return None
+
+
+def retrieve_encoder_settings(queue: Union[str, None] = None) -> dict:
+    """
+    Encoder settings set by the operator (ENCODER_* environment variables), the PRESET and THREADS set with the
+    settings command override them. Unset ones use the defaults.
+    :param queue: Queue the render runs on.
+    :return: Keyword arguments for EncoderProfile.
+    """
+    settings = {
+        "codec": retrieve_from_env("ENCODER_CODEC", str, allow_none=True),
+        "preset": retrieve_from_env("ENCODER_PRESET", str, allow_none=True),
+        "threads": retrieve_from_env("ENCODER_THREADS", int, allow_none=True),
+        "tune": retrieve_from_env("ENCODER_TUNE", str, allow_none=True),
+        "pix_fmt_in": retrieve_from_env("ENCODER_PIX_FMT", str, allow_none=True),
+    }
+
+    for key in ("preset", "threads"):
+        if (value := retrieve_queue_setting(queue, key.upper())) is not None:
+            settings[key] = value
+    return {k: v for k, v in settings.items() if v not in (None, "", "None")}
+
+
+def retrieve_render_budget(queue: Union[str, None] = None) -> Union[int, None]:
+    """
+    Seconds a render should take, set by the operator (RENDER_BUDGET environment variable), the BUDGET set with the
+    settings command overrides it. A budget needs the whole replay up front, so it disables streamed parsing.
+    :param queue: Queue the render runs on.
+    :return: Budget, None or 0 for no limit.
+    """
+    if (budget := retrieve_queue_setting(queue, "BUDGET")) is not None:
+        return budget
+    return retrieve_from_env("RENDER_BUDGET", int, allow_none=True)
+
+
+def retrieve_progress_settings() -> dict:
+    """
+    Progress reporting settings (PROGRESS_* environment variables). Unset ones use the defaults.
+    :return: Keyword arguments for ProgressReporter.
+    """
+    settings = {
+        "interval": retrieve_from_env("PROGRESS_INTERVAL", int, allow_none=True),
+        "step": retrieve_from_env("PROGRESS_STEP", float, allow_none=True),
+        "channel": retrieve_from_env("PROGRESS_CHANNEL", str, allow_none=True),
+    }
+    return {k: v for k, v in settings.items() if v not in (None, "", "None")}
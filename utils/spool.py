@@ -0,0 +1,102 @@
+import mmap
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from os import getenv
+from typing import Iterator
+
+
+class Spool:
+    """
+    File store on a directory shared by the bot and the workers. Jobs carry the key instead of
+    the data, files are removed once they are older than the ttl. Uploads and outputs are kept
+    under their temporary name, a job never shares them with another one.
+    """
+
+    def __init__(self, directory: str, ttl: int = 3600):
+        """
+        :param directory: Spool directory.
+        :param ttl: Seconds a file is kept after it was stored.
+        """
+        self._directory = directory
+        self._ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        assert os.path.basename(key) == key, "Invalid spool key."
+        return os.path.join(self._directory, key)
+
+    def new_temp(self, suffix: str = ".part") -> str:
+        """
+        A temporary file in the spool directory, to be stored with put_input or put_output.
+        :param suffix: File extension (ffmpeg picks the container from it).
+        :return: Path.
+        """
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=self._directory)
+        os.close(fd)
+        return path
+
+    def put_input(self, path: str, suffix: str = "", hold: int = 0) -> str:
+        """
+        Keeps an upload for its job under its temporary name. It's dated to the end of the job's
+        ttl, cleanup can't remove it while the job is queued, the job removes it once it ends.
+        :param path: File from new_temp.
+        :param suffix: File extension to keep.
+        :param hold: Seconds the job can stay queued.
+        :return: Key.
+        """
+        stored = f"{os.path.splitext(path)[0]}{suffix}"
+        os.replace(path, stored)
+
+        if hold:
+            expires = time.time() + hold
+            os.utime(stored, (expires, expires))
+        return os.path.basename(stored)
+
+    def put_output(self, path: str) -> str:
+        """
+        Keeps a job's output under its temporary name. Identical renders don't share a file, so
+        removing one once it's delivered never takes another job's output with it.
+        :param path: File from new_temp.
+        :return: Key.
+        """
+        key = os.path.basename(path)
+        assert os.path.samefile(self.path(key), path), "Not a spool file."
+        return key
+
+    @contextmanager
+    def open(self, key: str) -> Iterator[mmap.mmap]:
+        """
+        Memory-maps a stored file (read only).
+        :param key: Key.
+        :return:
+        """
+        with open(self.path(key), "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield data
+
+    def remove(self, key: str):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def cleanup(self):
+        """
+        Removes the files older than the ttl.
+        """
+        expired = time.time() - self._ttl
+
+        for entry in os.scandir(self._directory):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < expired:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+SPOOL = Spool(
+    getenv("SPOOL_DIR") or os.path.join(tempfile.gettempdir(), "renderer-spool"),
+    int(getenv("SPOOL_TTL") or 3600),
+)
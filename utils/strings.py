@@ -22,6 +22,12 @@ MSG_KND322 = "Value is not a number."
 MSG_RLV149 = "`{0}` is set to `{1}`"
 MSG_SOR600 = "You can only get {0} settings."
 MSG_DSQ832 = "`{0}` value is `{1}`"
+MSG_PRS318 = "Value should be one of {0}."
+MSG_QUE745 = "Queue settings can only be set for the {0} queues."
+MSG_QNS562 = "`{0}` isn't set for the `{1}` queue, the global value `{2}` is used."
+MSG_UNS204 = "`{0}` of the `{1}` queue is unset, the global value is used."
+MSG_QDF417 = "`{0}` isn't set for the `{1}` queue, its default `{2}` is used."
+MSG_UND638 = "`{0}` of the `{1}` queue is unset, its default `{2}` is used."
 MSG_ESG543 = "GUILD NAME: {0} | GUILD ID: {1}"
 MSG_YDV932 = "GUILD {0} not found."
 MSG_CEO189 = "Banned and left {0} server."
@@ -43,7 +49,8 @@ MSG_GVT802 = "☕ [Buy me a coffee]"
 MSG_KUQ121 = "This command will render the minimap from your replay file."
 MSG_FVV166 = "Includes damage dealt, ribbons, achievements and frags."
 MSG_AOB487 = "Adds Benny Hill theme and makes the renders twice as fast."
-MSG_RKN680 = ">>> `{}`\n`{} logs`\n`{} benny`\n`{} logs benny`\n`{} doom`\n`{} logs doom`"
+MSG_RKN680 = ">>> `{}`\n`{} logs`\n`{} benny`\n`{} logs benny`\n`{} doom`\n`{} logs doom`\n" \
+             "`{} clip 15:30 12:00`\n`{} logs clip 15:30 12:00`\n`{} frags`\n`{} logs frags`"
 MSG_CCT908 = "https://i.imgur.com/pOVEMIA.gif"
 MSG_PYD872 = "This command will render two replay files inside a zip file.\n" \
              "The replay files must start with `a-A` or `b-B`.\n" \
@@ -56,10 +63,14 @@ MSG_PYD872 = "This command will render two replay files inside a zip file.\n" \
              "duration the same as the shortest battle replay file."
 MSG_EOG769 = "Renders both replay files inside a zip file."
 MSG_OTV870 = "??? (player must have a kill)"
+MSG_CLP226 = "Renders the part of the battle between two battle timer values."
+MSG_FRG471 = "Renders the seconds around your frags and your death."
 MSG_ANM988 = "Unsupported version.\n0.10.9 - 0.10.11?(hopefully) replays only."
 MSG_KOL445 = "Unsupported battle type."
 MSG_JYQ473 = "Reading error."
 MSG_HIY955 = "Rendering error."
+MSG_TMR514 = "Invalid battle timer. Use `mm:ss`, e.g. `clip 15:30 12:00`."
+MSG_NCL903 = "Nothing to render. No frags/death or the clip is outside the battle."
 MSG_TOG346 = "Arena ID mismatch. Replays are not from the same battle."
 MSG_ATK550 = "Multiple replay files found."
 MSG_MDF285 = "Not enough replay files."